@@ -1,10 +1,20 @@
 """Flask application factory"""
 import os
 import logging
-import sqlite3
 from flask import Flask
 from flask_login import LoginManager
-from app.models import db, User
+from app.models import db
+from app.utils.cache import cache, user_cache, fragment_cache
+from app.utils.passwords import password_hasher
+from app.utils.instrumentation import instrumentation
+from app.utils.metrics import metrics
+from app.utils.fragments import FragmentCacheExtension
+from app.utils.assets import static_assets
+from app.utils.compression import compression
+from app.utils.events import events
+from app.utils.sqlite_tuning import configure_sqlite
+from app.utils.db_pool import pool_options, configure_pool
+from app import migrations
 from config import config_dict
 
 # Configure logging
@@ -15,37 +25,24 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def _run_migrations(app):
-    """Apply any missing columns that db.create_all() won't add to existing tables."""
-    uri = app.config['SQLALCHEMY_DATABASE_URI']
-    # Robustly extract the file path from sqlite:/// or sqlite:////
-    if not uri.startswith('sqlite:///'):
-        return  # not SQLite – skip
-    db_path = uri[len('sqlite:///'):]
-    # On Windows the URI is sqlite:///C:\... so stripping 3 slashes gives C:\...
-    # On Unix the URI is sqlite:////abs/path so stripping 3 slashes gives /abs/path
-    # Both cases are handled correctly above.
+def _check_schema(app):
+    """Cheap startup schema check, controlled by SCHEMA_STARTUP (auto/check/off)"""
+    mode = app.config.get('SCHEMA_STARTUP', 'auto')
+    if mode == 'off':
+        return
+    current = migrations.current_version(db.engine)
+    latest  = migrations.latest_version()
+    if current >= latest:
+        return
+    if mode == 'auto':
+        applied = migrations.setup_schema(db)
+        logger.info(f"✅ Database schema set up (applied migrations: {applied or 'none'})")
+    else:
+        logger.error(f"Database schema is at version {current} but the app expects {latest}; "
+                     f"run `flask --app run.py preflight`")
 
-    migrations = [
-        ("goal", "completed", "BOOLEAN NOT NULL DEFAULT 0"),
-        ("task", "priority",  "VARCHAR(10) DEFAULT 'Medium'"),
-    ]
-    try:
-        conn = sqlite3.connect(db_path)
-        cur  = conn.cursor()
-        for table, column, col_def in migrations:
-            cur.execute(f"PRAGMA table_info({table})")
-            existing = [row[1] for row in cur.fetchall()]
-            if column not in existing:
-                cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {col_def}")
-                logger.info(f"Migration: added column '{column}' to table '{table}'")
-        conn.commit()
-        conn.close()
-    except Exception as exc:
-        logger.warning(f"Migration warning: {exc}")
-
-def create_app(config_name='development'):
-    """Application factory function"""
+def create_app(config_name='development', config_overrides=None):
+    """Application factory function (config_overrides are applied on top of the config class)"""
     
     # Get config
     config_name = config_name or os.environ.get('FLASK_ENV', 'development')
@@ -65,16 +62,51 @@ def create_app(config_name='development'):
     
     # Load configuration object
     app.config.from_object(config)
+    if config_overrides:
+        app.config.update(config_overrides)
     
     # use absolute path for sqlite to avoid relative path issues
-    # when the config defines a sqlite URI, convert to absolute based on instance path
+    # when the config defines a relative sqlite URI, convert to absolute based on instance path
     uri = app.config.get('SQLALCHEMY_DATABASE_URI', '')
-    if uri.startswith('sqlite:///'):
+    if uri.startswith('sqlite:///') and not os.path.isabs(uri[len('sqlite:///'):]):
         db_path = os.path.join(app.instance_path, 'database.db')
         app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{db_path}"
     
+    # Connection pool profile (DB_POOL); explicit SQLALCHEMY_ENGINE_OPTIONS win
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        **pool_options(app.config['SQLALCHEMY_DATABASE_URI'], app.config.get('DB_POOL')),
+        **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}),
+    }
+    
     # Initialize Database
     db.init_app(app)
+    with app.app_context():
+        configure_sqlite(db.engine, app.config.get('SQLITE_PRAGMAS'))
+        configure_pool(db.engine, app.config.get('DB_POOL_STATS_LOG_INTERVAL', 0))
+    
+    # Initialize analytics cache
+    cache.init_app(app)
+    user_cache.init_app(app)
+    fragment_cache.init_app(app)
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    
+    # Initialize password hashing backend
+    password_hasher.init_app(app)
+    
+    # Opt-in request instrumentation (INSTRUMENTATION_ENABLED)
+    instrumentation.init_app(app)
+    
+    # Prometheus metrics shared across workers (METRICS_ENABLED)
+    metrics.init_app(app)
+    
+    # Fingerprinted static assets, once `flask assets build` has run
+    static_assets.init_app(app)
+    
+    # gzip/brotli/zstd for HTML, JSON and exports (COMPRESS_*)
+    compression.init_app(app)
+    
+    # Server-Sent Events for open dashboards, fanned out via a shared log (EVENTS_*)
+    events.init_app(app)
     
     # Initialize Login Manager
     login_manager = LoginManager()
@@ -82,28 +114,35 @@ def create_app(config_name='development'):
     login_manager.login_view = "auth.login"
     login_manager.login_message = "Please log in to access this page"
     login_manager.login_message_category = "info"
+    # The JSON API answers 401 instead of redirecting to the login page
+    login_manager.blueprint_login_views = {'api': None}
     
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        from app.services import UserService
+        return UserService.load_session_user(int(user_id))
     
     # Register blueprints
-    from app.routes import auth_bp, tasks_bp, goals_bp, dashboard_bp, profile_bp
+    from app.routes import (auth_bp, tasks_bp, goals_bp, dashboard_bp, profile_bp, api_bp,
+                            transfer_bp, metrics_bp)
     
     app.register_blueprint(auth_bp)
     app.register_blueprint(tasks_bp)
     app.register_blueprint(goals_bp)
     app.register_blueprint(dashboard_bp)
     app.register_blueprint(profile_bp)
+    app.register_blueprint(api_bp)
+    app.register_blueprint(transfer_bp)
+    app.register_blueprint(metrics_bp)
+    
+    # CLI commands (flask db upgrade / flask db status)
+    from app.cli import register_commands
+    register_commands(app)
     
-    # Create tables - explicitly import all models first so create_all sees them
+    # Schema setup is a one-shot preflight step (flask preflight); at startup
+    # we only compare the recorded schema version with the latest migration
     with app.app_context():
-        from app.models.user import User
-        from app.models.task import Task
-        from app.models.goal import Goal
-        db.create_all()
-        _run_migrations(app)
-        logger.info("✅ Database tables created successfully!")
+        _check_schema(app)
     
     # Error handlers
     @app.errorhandler(404)
@@ -0,0 +1,96 @@
+"""Flask CLI commands (run with `flask --app run.py <command>`)"""
+import time
+import click
+from flask.cli import AppGroup
+from app.models import db
+from app import migrations
+
+db_cli = AppGroup('db', help="Database schema management")
+assets_cli = AppGroup('assets', help="Static asset build")
+goals_cli = AppGroup('goals', help="Goal maintenance")
+stats_cli = AppGroup('stats', help="Daily statistics rollup")
+
+
+@db_cli.command('upgrade')
+@click.option('--target', type=int, default=None, help="Stop at this migration version")
+def upgrade_command(target):
+    """Create missing tables and apply pending migrations"""
+    if target is None:
+        applied = migrations.setup_schema(db)
+    else:
+        db.create_all()
+        applied = migrations.upgrade(db.engine, target)
+    if applied:
+        click.echo(f"Applied migrations: {', '.join(str(v) for v in applied)}")
+    else:
+        click.echo("Schema is up to date")
+    click.echo(f"Schema version: {migrations.current_version(db.engine)}")
+
+
+@db_cli.command('status')
+def status_command():
+    """Show applied and pending migrations"""
+    for version, description, applied_at in migrations.status(db.engine):
+        state = applied_at.strftime('%Y-%m-%d %H:%M:%S') if applied_at else 'pending'
+        click.echo(f"{version:04d}  {state:<19}  {description}")
+    click.echo(f"Current version: {migrations.current_version(db.engine)} "
+               f"(latest {migrations.latest_version()})")
+
+
+@click.command('preflight')
+def preflight_command():
+    """One-shot schema setup to run before starting the web workers"""
+    start = time.perf_counter()
+    applied = migrations.setup_schema(db)
+    elapsed = (time.perf_counter() - start) * 1000
+    click.echo(f"Preflight complete in {elapsed:.0f}ms: schema version "
+               f"{migrations.current_version(db.engine)}, "
+               f"applied {', '.join(str(v) for v in applied) if applied else 'nothing'}")
+
+
+@assets_cli.command('build')
+def build_assets_command():
+    """Fingerprint and precompress static files into app/static/dist"""
+    from flask import current_app
+    from app.utils.assets import build_assets, brotli
+    manifest = build_assets(current_app.static_folder)
+    click.echo(f"Built {len(manifest)} assets"
+               + ("" if brotli else " (gzip only: install brotli for .br variants)"))
+    for source, hashed in sorted(manifest.items()):
+        click.echo(f"  {source} -> {hashed}")
+
+
+@goals_cli.command('reconcile')
+@click.option('--dry-run', is_flag=True, help="Report drift without fixing it")
+def reconcile_goals_command(dry_run):
+    """Recompute goal task counters from the task table and report drift"""
+    from app.services.goal_service import GoalService
+    drift = GoalService.reconcile_task_counts(fix=not dry_run)
+    for goal_id, user_id, stored, actual in drift:
+        click.echo(f"  goal {goal_id} (user {user_id}): stored {stored[0]}/{stored[1]}, "
+                   f"actual {actual[0]}/{actual[1]} (tasks/completed)")
+    if not drift:
+        click.echo("Goal counters are consistent")
+    else:
+        click.echo(f"{len(drift)} goal{'s' if len(drift) != 1 else ''} drifted"
+                   + (" (not fixed: dry run)" if dry_run else ", fixed"))
+
+
+@stats_cli.command('backfill')
+@click.option('--user-id', type=int, default=None, help="Only rebuild this user's rows")
+def backfill_stats_command(user_id):
+    """Rebuild the daily_stats rollup from task timestamps"""
+    from app.services.stats_service import StatsService
+    start = time.perf_counter()
+    rows = StatsService.rebuild(user_id)
+    elapsed = (time.perf_counter() - start) * 1000
+    click.echo(f"Wrote {rows} daily_stats row{'s' if rows != 1 else ''} in {elapsed:.0f}ms")
+
+
+def register_commands(app):
+    """Attach CLI command groups to the app"""
+    app.cli.add_command(db_cli)
+    app.cli.add_command(preflight_command)
+    app.cli.add_command(assets_cli)
+    app.cli.add_command(goals_cli)
+    app.cli.add_command(stats_cli)
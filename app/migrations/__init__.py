@@ -0,0 +1,160 @@
+"""Versioned schema migrations
+
+Migrations are numbered functions registered with @migration in
+app/migrations/versions.py. Applied versions are recorded in the
+schema_version table, so each migration runs once per database.
+Every migration must be idempotent (use the helpers below) because a
+fresh database created by db.create_all() already has the latest schema.
+"""
+import logging
+from datetime import datetime
+import sqlalchemy as sa
+from sqlalchemy.schema import CreateColumn
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS = []
+
+schema_version = sa.Table(
+    'schema_version', sa.MetaData(),
+    sa.Column('version', sa.Integer, primary_key=True, autoincrement=False),
+    sa.Column('description', sa.String(200), nullable=False),
+    sa.Column('applied_at', sa.DateTime, nullable=False),
+)
+
+
+def migration(version, description):
+    """Register a migration function taking a SQLAlchemy connection"""
+    def decorator(fn):
+        if any(m[0] == version for m in MIGRATIONS):
+            raise ValueError(f"Duplicate migration version {version}")
+        MIGRATIONS.append((version, description, fn))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return fn
+    return decorator
+
+
+# ── Idempotent DDL helpers (SQLite and Postgres) ──
+
+def add_column(conn, table, column):
+    """ALTER TABLE ... ADD COLUMN unless the column already exists"""
+    existing = {c['name'] for c in sa.inspect(conn).get_columns(table)}
+    if column.name in existing:
+        return False
+    table_sql = conn.dialect.identifier_preparer.quote(table)
+    column_sql = CreateColumn(column).compile(dialect=conn.dialect)
+    conn.execute(sa.text(f"ALTER TABLE {table_sql} ADD COLUMN {column_sql}"))
+    logger.info(f"Migration: added column '{column.name}' to table '{table}'")
+    return True
+
+
+def create_index(conn, name, table, columns, unique=False):
+    """CREATE INDEX unless an index with this name already exists"""
+    existing = {i['name'] for i in sa.inspect(conn).get_indexes(table)}
+    if name in existing:
+        return False
+    quote = conn.dialect.identifier_preparer.quote
+    cols = ', '.join(quote(c) for c in columns)
+    kind = 'UNIQUE INDEX' if unique else 'INDEX'
+    conn.execute(sa.text(f"CREATE {kind} {quote(name)} ON {quote(table)} ({cols})"))
+    logger.info(f"Migration: created index '{name}' on '{table}'")
+    return True
+
+
+def drop_column(conn, table, name):
+    """ALTER TABLE ... DROP COLUMN if the column exists (SQLite 3.35+)"""
+    existing = {c['name'] for c in sa.inspect(conn).get_columns(table)}
+    if name not in existing:
+        return False
+    quote = conn.dialect.identifier_preparer.quote
+    conn.execute(sa.text(f"ALTER TABLE {quote(table)} DROP COLUMN {quote(name)}"))
+    logger.info(f"Migration: dropped column '{name}' from table '{table}'")
+    return True
+
+
+# ── Engine ──
+
+def _load_versions():
+    # Importing the module registers its migrations
+    from app.migrations import versions  # noqa: F401
+
+
+def latest_version():
+    _load_versions()
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+
+def current_version(engine):
+    """Highest applied migration, 0 if none (or no schema_version table)"""
+    with engine.connect() as conn:
+        if not sa.inspect(conn).has_table('schema_version'):
+            return 0
+        return conn.execute(sa.select(sa.func.max(schema_version.c.version))).scalar() or 0
+
+
+def status(engine):
+    """List of (version, description, applied_at or None) for every migration"""
+    _load_versions()
+    applied = {}
+    with engine.connect() as conn:
+        if sa.inspect(conn).has_table('schema_version'):
+            applied = dict(conn.execute(
+                sa.select(schema_version.c.version, schema_version.c.applied_at)).all())
+    return [(v, desc, applied.get(v)) for v, desc, _ in MIGRATIONS]
+
+
+def _lock(conn):
+    """Serialise concurrent upgraders (e.g. several workers booting at once)"""
+    if conn.dialect.name == 'postgresql':
+        conn.execute(sa.text("SELECT pg_advisory_xact_lock(724311)"))
+    elif conn.dialect.name == 'sqlite':
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def upgrade(engine, target=None):
+    """Apply pending migrations up to target (default: latest). Returns versions applied."""
+    _load_versions()
+    schema_version.create(engine, checkfirst=True)
+    applied = []
+    for version, description, fn in MIGRATIONS:
+        if target is not None and version > target:
+            break
+        with engine.connect() as conn:
+            if conn.dialect.name == 'sqlite':
+                # Let BEGIN IMMEDIATE take the write lock before reading state
+                conn = conn.execution_options(isolation_level='AUTOCOMMIT')
+                _lock(conn)
+                try:
+                    done = _apply(conn, version, description, fn)
+                    conn.exec_driver_sql("COMMIT")
+                except Exception:
+                    conn.exec_driver_sql("ROLLBACK")
+                    raise
+            else:
+                with conn.begin():
+                    _lock(conn)
+                    done = _apply(conn, version, description, fn)
+        if done:
+            applied.append(version)
+    return applied
+
+
+def setup_schema(db):
+    """Create missing tables and apply pending migrations (the preflight step)"""
+    # Import every model so create_all sees them
+    from app.models import User, Task, Goal, DailyStat  # noqa: F401
+    db.create_all()
+    return upgrade(db.engine)
+
+
+def _apply(conn, version, description, fn):
+    already = conn.execute(
+        sa.select(schema_version.c.version).where(schema_version.c.version == version)
+    ).first()
+    if already:
+        return False
+    fn(conn)
+    conn.execute(schema_version.insert().values(
+        version=version, description=description, applied_at=datetime.utcnow()))
+    logger.info(f"Migration {version:04d} applied: {description}")
+    return True
@@ -0,0 +1,95 @@
+"""Numbered schema migrations (append new ones at the bottom)"""
+import sqlalchemy as sa
+from app.migrations import migration, add_column, create_index, drop_column
+
+
+@migration(1, "Add goal.completed and task.priority to legacy databases")
+def add_legacy_columns(conn):
+    add_column(conn, 'goal', sa.Column('completed', sa.Boolean, nullable=False,
+                                       server_default=sa.false()))
+    # A database created by create_all() already has priority_code (see 8)
+    if 'priority_code' not in {c['name'] for c in sa.inspect(conn).get_columns('task')}:
+        add_column(conn, 'task', sa.Column('priority', sa.String(10), server_default='Medium'))
+
+
+@migration(2, "Add user.data_version for cache invalidation")
+def add_user_data_version(conn):
+    add_column(conn, 'user', sa.Column('data_version', sa.Integer, nullable=False,
+                                       server_default='0'))
+
+
+@migration(3, "Composite index for the dashboard task listing")
+def add_task_listing_index(conn):
+    create_index(conn, 'ix_task_user_completed_due', 'task',
+                 ['user_id', 'completed', 'due_date', 'id'])
+
+
+@migration(4, "Foreign-key indexes on task.goal_id and goal.user_id")
+def add_foreign_key_indexes(conn):
+    create_index(conn, 'ix_task_goal_id', 'task', ['goal_id'])
+    create_index(conn, 'ix_goal_user_id', 'goal', ['user_id'])
+    create_index(conn, 'ix_task_user_id', 'task', ['user_id'])
+
+
+@migration(5, "Denormalised goal.task_count and goal.completed_task_count")
+def add_goal_task_counters(conn):
+    add_column(conn, 'goal', sa.Column('task_count', sa.Integer, nullable=False,
+                                       server_default='0'))
+    add_column(conn, 'goal', sa.Column('completed_task_count', sa.Integer, nullable=False,
+                                       server_default='0'))
+    # Backfill from the task table (recomputes, so safe to re-run)
+    conn.execute(sa.text(
+        "UPDATE goal SET "
+        "task_count = (SELECT COUNT(*) FROM task WHERE task.goal_id = goal.id), "
+        "completed_task_count = (SELECT COUNT(*) FROM task "
+        "WHERE task.goal_id = goal.id AND task.completed)"))
+
+
+@migration(6, "Task timestamps and the daily_stats rollup table")
+def add_daily_stats(conn):
+    from app.models import DailyStat
+    # Existing tasks keep NULL timestamps: their history is unknown
+    add_column(conn, 'task', sa.Column('created_at', sa.DateTime))
+    add_column(conn, 'task', sa.Column('completed_at', sa.DateTime))
+    DailyStat.__table__.create(conn, checkfirst=True)
+
+
+@migration(7, "FTS5 search index over task and goal titles/descriptions (SQLite)")
+def add_search_index(conn):
+    # Postgres searches with ILIKE instead (see SearchService)
+    if conn.dialect.name != 'sqlite':
+        return
+    for table in ('task', 'goal'):
+        fts = f"{table}_fts"
+        if sa.inspect(conn).has_table(fts):
+            continue
+        # Contentless: the rows live in the base table, the index only maps
+        # tokens to ids. `owner` ('u<user_id>') lets a MATCH restrict to one user.
+        conn.execute(sa.text(
+            f"CREATE VIRTUAL TABLE {fts} USING fts5(owner, title, description, "
+            f"content='', tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')"))
+        row = f"'u' || {{0}}.user_id, {{0}}.title, coalesce({{0}}.description, '')"
+        insert = f"INSERT INTO {fts}(rowid, owner, title, description) VALUES (new.id, {row.format('new')});"
+        delete = (f"INSERT INTO {fts}({fts}, rowid, owner, title, description) "
+                  f"VALUES ('delete', old.id, {row.format('old')});")
+        conn.execute(sa.text(f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN {insert} END"))
+        conn.execute(sa.text(f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN {delete} END"))
+        conn.execute(sa.text(
+            f"CREATE TRIGGER {fts}_au AFTER UPDATE OF user_id, title, description ON {table} "
+            f"BEGIN {delete} {insert} END"))
+        conn.execute(sa.text(
+            f"INSERT INTO {fts}(rowid, owner, title, description) "
+            f"SELECT id, {row.format(table)} FROM {table}"))
+
+
+@migration(8, "Task priority as a small integer code, indexed for filtering")
+def add_task_priority_code(conn):
+    add_column(conn, 'task', sa.Column('priority_code', sa.SmallInteger, nullable=False,
+                                       server_default='2'))
+    if 'priority' in {c['name'] for c in sa.inspect(conn).get_columns('task')}:
+        conn.execute(sa.text(
+            "UPDATE task SET priority_code = "
+            "CASE priority WHEN 'High' THEN 1 WHEN 'Low' THEN 3 ELSE 2 END"))
+        drop_column(conn, 'task', 'priority')
+    create_index(conn, 'ix_task_user_completed_priority_due', 'task',
+                 ['user_id', 'completed', 'priority_code', 'due_date', 'id'])
@@ -5,5 +5,6 @@ db = SQLAlchemy()
 from app.models.user import User
 from app.models.task import Task
 from app.models.goal import Goal
+from app.models.daily_stat import DailyStat
 
-__all__ = ['db', 'User', 'Task', 'Goal']
+__all__ = ['db', 'User', 'Task', 'Goal', 'DailyStat']
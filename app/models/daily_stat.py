@@ -0,0 +1,27 @@
+from app.models import db
+
+class DailyStat(db.Model):
+    """Per-user, per-day task activity rollup (maintained by StatsService)"""
+    __tablename__ = 'daily_stats'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    created = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    completed = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Completions that came after the task's due date
+    completed_overdue = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    completed_high = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    completed_medium = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    completed_low = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
+    COUNTERS = ('created', 'completed', 'completed_overdue',
+                'completed_high', 'completed_medium', 'completed_low')
+    
+    def to_dict(self):
+        """Serialise for JSON responses"""
+        data = {'date': self.day.strftime('%Y-%m-%d')}
+        data.update({name: getattr(self, name) for name in self.COUNTERS})
+        return data
+    
+    def __repr__(self):
+        return f'<DailyStat {self.user_id} {self.day}>'
@@ -9,6 +9,10 @@ class Goal(db.Model):
     description = db.Column(db.Text)
     target_date = db.Column(db.DateTime)
     completed = db.Column(db.Boolean, default=False)
+    # Denormalised counts of linked tasks, maintained by TaskService
+    # (`flask --app run.py goals reconcile` repairs drift)
+    task_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    completed_task_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Foreign Keys
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
@@ -16,5 +20,16 @@ class Goal(db.Model):
     # Relationships
     tasks = db.relationship('Task', backref='goal', lazy=True)
     
+    def to_dict(self, progress=None):
+        """Serialise for JSON responses"""
+        return {
+            'id':          self.id,
+            'title':       self.title,
+            'description': self.description,
+            'target_date': self.target_date.strftime('%Y-%m-%d') if self.target_date else None,
+            'completed':   bool(self.completed),
+            'progress':    progress,
+        }
+    
     def __repr__(self):
         return f'<Goal {self.title}>'
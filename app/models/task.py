@@ -1,19 +1,66 @@
 from app.models import db
 
+# Stored codes sort in priority order (High first)
+PRIORITY_CODES = {'High': 1, 'Medium': 2, 'Low': 3}
+PRIORITY_NAMES = {code: name for name, code in PRIORITY_CODES.items()}
+
+
+class Priority(db.TypeDecorator):
+    """'High' / 'Medium' / 'Low' in Python, a SMALLINT code in the database"""
+    impl = db.SmallInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, int):
+            return value
+        try:
+            return PRIORITY_CODES[value]
+        except KeyError:
+            raise ValueError(f"Invalid priority '{value}'") from None
+
+    def process_result_value(self, value, dialect):
+        return PRIORITY_NAMES.get(value) if value is not None else None
+
+
 class Task(db.Model):
     """Task model for user tasks"""
     __tablename__ = 'task'
+    __table_args__ = (
+        # Serves the dashboard listing order and keyset pagination
+        db.Index('ix_task_user_completed_due', 'user_id', 'completed', 'due_date', 'id'),
+        # Serves the same listing filtered by priority (e.g. overdue High)
+        db.Index('ix_task_user_completed_priority_due',
+                 'user_id', 'completed', 'priority_code', 'due_date', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(150), nullable=False)
     description = db.Column(db.Text)
     due_date = db.Column(db.DateTime)
-    priority = db.Column(db.String(10), default='Medium')
+    priority = db.Column('priority_code', Priority, nullable=False, default='Medium',
+                         server_default='2')
     completed = db.Column(db.Boolean, default=False)
+    # Set by TaskService; NULL for tasks that predate them (or imported as done)
+    created_at = db.Column(db.DateTime)
+    completed_at = db.Column(db.DateTime)
     
     # Foreign Keys
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
-    goal_id = db.Column(db.Integer, db.ForeignKey('goal.id'), nullable=True)
+    goal_id = db.Column(db.Integer, db.ForeignKey('goal.id'), nullable=True, index=True)
+    
+    def to_dict(self):
+        """Serialise for JSON responses"""
+        return {
+            'id':           self.id,
+            'title':        self.title,
+            'description':  self.description,
+            'due_date':     self.due_date.strftime('%Y-%m-%d') if self.due_date else None,
+            'priority':     self.priority,
+            'completed':    bool(self.completed),
+            'goal_id':      self.goal_id,
+            'created_at':   self.created_at.isoformat(timespec='seconds') if self.created_at else None,
+            'completed_at': self.completed_at.isoformat(timespec='seconds') if self.completed_at else None,
+        }
     
     def __repr__(self):
         return f'<Task {self.title}>'
@@ -9,10 +9,32 @@ class User(db.Model, UserMixin):
     full_name = db.Column(db.String(150), nullable=False)
     email = db.Column(db.String(150), unique=True, nullable=False, index=True)
     password = db.Column(db.String(200), nullable=False)
+    # Bumped on every task/goal write; used to key per-user caches
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Relationships
     tasks = db.relationship('Task', backref='user', lazy=True, cascade='all, delete-orphan')
     goals = db.relationship('Goal', backref='user', lazy=True, cascade='all, delete-orphan')
+    daily_stats = db.relationship('DailyStat', lazy=True, cascade='all, delete-orphan')
     
     def __repr__(self):
         return f'<User {self.email}>'
+
+
+class SessionUser(UserMixin):
+    """Lightweight, cacheable stand-in for User used as current_user"""
+
+    def __init__(self, id, full_name, email):
+        self.id = id
+        self.full_name = full_name
+        self.email = email
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.full_name, user.email)
+
+    def to_dict(self):
+        return {'id': self.id, 'full_name': self.full_name, 'email': self.email}
+
+    def __repr__(self):
+        return f'<SessionUser {self.email}>'
@@ -4,5 +4,9 @@ from app.routes.tasks import tasks_bp
 from app.routes.goals import goals_bp
 from app.routes.dashboard import dashboard_bp
 from app.routes.profile import profile_bp
+from app.routes.api import api_bp
+from app.routes.transfer import transfer_bp
+from app.routes.metrics import metrics_bp
 
-__all__ = ['auth_bp', 'tasks_bp', 'goals_bp', 'dashboard_bp', 'profile_bp']
+__all__ = ['auth_bp', 'tasks_bp', 'goals_bp', 'dashboard_bp', 'profile_bp', 'api_bp',
+           'transfer_bp', 'metrics_bp']
@@ -0,0 +1,291 @@
+"""Versioned JSON API for tasks and goals
+
+Every GET carries a strong ETag derived from the user's data version
+(bumped by the service mutators), so polling clients that send
+If-None-Match get a 304 without the server loading any tasks or goals.
+"""
+import hashlib
+from datetime import date, datetime, timedelta
+from functools import wraps
+from flask import Blueprint, request, make_response, url_for, current_app
+from flask_login import login_required, current_user
+from app.services import TaskService, GoalService, UserService, StatsService, SearchService
+
+api_bp = Blueprint('api', __name__, url_prefix='/api/v1')
+
+# Longest range the trends endpoint serves in one response
+MAX_TREND_DAYS = 731
+# Writable string fields of the JSON bodies
+TASK_TEXT_FIELDS = ('title', 'description', 'due_date', 'priority')
+GOAL_TEXT_FIELDS = ('title', 'description', 'target_date')
+
+
+def _etag(version):
+    """
+    Strong ETag for this request's URL at the given data version. The date
+    is part of it because overdue filters and time-based goal progress
+    change at midnight without any write.
+    """
+    digest = hashlib.sha1(request.full_path.encode()).hexdigest()[:12]
+    return f"u{current_user.id}-v{version}-d{date.today():%Y%m%d}-{digest}"
+
+
+def conditional(view):
+    """Answer If-None-Match with 304 when the user's data version is unchanged"""
+    @wraps(view)
+    def decorated_function(*args, **kwargs):
+        etag = _etag(UserService.get_data_version(current_user.id))
+        # Weak comparison (RFC 9110): compression turns the ETag into W/"..."
+        if request.if_none_match.contains_weak(etag):
+            response = make_response('', 304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return decorated_function
+
+
+def _written(payload, status=200, headers=None):
+    """Response for a write, tagged with the new data version"""
+    response = make_response(payload, status, headers or {})
+    response.set_etag(f"u{current_user.id}-v{UserService.get_data_version(current_user.id)}")
+    return response
+
+
+def _error(message, status=400):
+    return {"error": message}, status
+
+
+def _json_body():
+    data = request.get_json(silent=True)
+    return data if isinstance(data, dict) else None
+
+
+def _field_type_error(data, text=(), integer=()):
+    """Message for the first field with the wrong JSON type (null is allowed), else None"""
+    for name in text:
+        if data.get(name) is not None and not isinstance(data[name], str):
+            return f"{name} must be a string"
+    for name in integer:
+        value = data.get(name)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, int)):
+            return f"{name} must be an integer"
+    return None
+
+
+def _owned_task(task_id):
+    task = TaskService.get_task(task_id)
+    return task if task and task.user_id == current_user.id else None
+
+
+def _owned_goal(goal_id):
+    goal = GoalService.get_goal(goal_id)
+    return goal if goal and goal.user_id == current_user.id else None
+
+
+def _fmt_date(value):
+    return value.strftime('%Y-%m-%d') if value else ''
+
+
+@api_bp.errorhandler(401)
+def unauthorized(error):
+    return _error("Authentication required", 401)
+
+
+# ── Tasks ──
+
+@api_bp.route('/tasks', methods=['GET'])
+@login_required
+@conditional
+def list_tasks():
+    limit = min(max(request.args.get('limit', current_app.config['TASKS_PER_PAGE'], type=int), 1), 200)
+    try:
+        filters = TaskService.parse_filters(request.args)
+        tasks, next_cursor = TaskService.get_task_page(
+            current_user.id, request.args.get('cursor'), limit, filters)
+    except ValueError as e:
+        return _error(str(e))
+    return {"tasks": [t.to_dict() for t in tasks], "next_cursor": next_cursor}
+
+
+@api_bp.route('/tasks/<int:task_id>', methods=['GET'])
+@login_required
+@conditional
+def get_task(task_id):
+    task = _owned_task(task_id)
+    if not task:
+        return _error("Task not found", 404)
+    return task.to_dict()
+
+
+@api_bp.route('/tasks', methods=['POST'])
+@login_required
+def create_task():
+    data = _json_body()
+    if data is None:
+        return _error("Expected a JSON object")
+    invalid = _field_type_error(data, TASK_TEXT_FIELDS, ('goal_id',))
+    if invalid:
+        return _error(invalid)
+    goal_id = data.get('goal_id')
+    if goal_id is not None and not _owned_goal(goal_id):
+        return _error("Goal not found")
+    task, message = TaskService.create_task(
+        (data.get('title') or '').strip(), (data.get('description') or '').strip(),
+        (data.get('due_date') or '').strip(), current_user.id, goal_id,
+        data.get('priority') or 'Medium')
+    if not task:
+        return _error(message)
+    return _written(task.to_dict(), 201,
+                    {'Location': url_for('api.get_task', task_id=task.id)})
+
+
+@api_bp.route('/tasks/<int:task_id>', methods=['PATCH', 'PUT'])
+@login_required
+def update_task(task_id):
+    task = _owned_task(task_id)
+    if not task:
+        return _error("Task not found", 404)
+    data = _json_body()
+    if data is None:
+        return _error("Expected a JSON object")
+    invalid = _field_type_error(data, TASK_TEXT_FIELDS, ('goal_id',))
+    if invalid:
+        return _error(invalid)
+    goal_id = data.get('goal_id', task.goal_id)
+    if goal_id is not None and not _owned_goal(goal_id):
+        return _error("Goal not found")
+
+    if any(f in data for f in TASK_TEXT_FIELDS) or 'goal_id' in data:
+        success, message = TaskService.update_task(
+            task_id, current_user.id,
+            (data.get('title', task.title) or '').strip(),
+            (data.get('description', task.description) or '').strip(),
+            (data.get('due_date', _fmt_date(task.due_date)) or '').strip(),
+            data.get('priority', task.priority), goal_id)
+        if not success:
+            return _error(message)
+    if data.get('completed') and not task.completed:
+        success, message = TaskService.complete_task(task_id, current_user.id)
+        if not success:
+            return _error(message)
+    return _written(TaskService.get_task(task_id).to_dict())
+
+
+# ── Goals ──
+
+@api_bp.route('/goals', methods=['GET'])
+@login_required
+@conditional
+def list_goals():
+    goals = GoalService.get_user_goals(current_user.id)
+    progress = GoalService.get_progress_map(current_user.id, date.today())
+    return {"goals": [g.to_dict(progress.get(g.id, 0)) for g in goals]}
+
+
+@api_bp.route('/goals/<int:goal_id>', methods=['GET'])
+@login_required
+@conditional
+def get_goal(goal_id):
+    goal = _owned_goal(goal_id)
+    if not goal:
+        return _error("Goal not found", 404)
+    return goal.to_dict(GoalService.get_goal_progress(goal))
+
+
+@api_bp.route('/goals', methods=['POST'])
+@login_required
+def create_goal():
+    data = _json_body()
+    if data is None:
+        return _error("Expected a JSON object")
+    invalid = _field_type_error(data, GOAL_TEXT_FIELDS)
+    if invalid:
+        return _error(invalid)
+    goal, message = GoalService.create_goal(
+        (data.get('title') or '').strip(), (data.get('description') or '').strip(),
+        (data.get('target_date') or '').strip(), current_user.id)
+    if not goal:
+        return _error(message)
+    return _written(goal.to_dict(GoalService.get_goal_progress(goal)), 201,
+                    {'Location': url_for('api.get_goal', goal_id=goal.id)})
+
+
+@api_bp.route('/goals/<int:goal_id>', methods=['PATCH', 'PUT'])
+@login_required
+def update_goal(goal_id):
+    goal = _owned_goal(goal_id)
+    if not goal:
+        return _error("Goal not found", 404)
+    data = _json_body()
+    if data is None:
+        return _error("Expected a JSON object")
+    invalid = _field_type_error(data, GOAL_TEXT_FIELDS)
+    if invalid:
+        return _error(invalid)
+
+    if any(f in data for f in GOAL_TEXT_FIELDS):
+        success, message = GoalService.update_goal(
+            goal_id, current_user.id,
+            (data.get('title', goal.title) or '').strip(),
+            (data.get('description', goal.description) or '').strip(),
+            (data.get('target_date', _fmt_date(goal.target_date)) or '').strip())
+        if not success:
+            return _error(message)
+    if 'completed' in data and bool(data['completed']) != bool(goal.completed):
+        success, message = GoalService.complete_goal(goal_id, current_user.id)
+        if not success:
+            return _error(message)
+    goal = GoalService.get_goal(goal_id)
+    return _written(goal.to_dict(GoalService.get_goal_progress(goal)))
+
+
+# ── Search ──
+
+@api_bp.route('/search', methods=['GET'])
+@login_required
+@conditional
+def search():
+    """Ranked search: ?q=words&type=tasks|goals&limit=&cursor="""
+    kind = request.args.get('type', 'tasks')
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    try:
+        items, next_cursor = SearchService.search(
+            current_user.id, request.args.get('q', ''), kind,
+            limit, request.args.get('cursor'))
+    except ValueError as e:
+        return _error(str(e))
+    if kind == 'goals':
+        results = [g.to_dict(GoalService.get_goal_progress(g)) for g in items]
+    else:
+        results = [t.to_dict() for t in items]
+    return {"results": results, "next_cursor": next_cursor}
+
+
+# ── Trends ──
+
+@api_bp.route('/stats/daily', methods=['GET'])
+@login_required
+@conditional
+def daily_stats():
+    """
+    Per-day activity from the daily_stats rollup: ?start=YYYY-MM-DD&end=YYYY-MM-DD
+    (default: the 30 days ending today; the ETag includes the date, so the
+    moving default range is safe to revalidate).
+    """
+    try:
+        end = datetime.strptime(request.args.get('end') or date.today().isoformat(), '%Y-%m-%d').date()
+        start = (datetime.strptime(request.args['start'], '%Y-%m-%d').date()
+                 if request.args.get('start') else end - timedelta(days=29))
+    except ValueError:
+        return _error("Invalid date format. Use YYYY-MM-DD")
+    if start > end:
+        return _error("start must not be after end")
+    if (end - start).days >= MAX_TREND_DAYS:
+        return _error(f"Range is limited to {MAX_TREND_DAYS} days")
+    days = StatsService.get_daily_stats(current_user.id, start, end)
+    totals = {name: sum(d[name] for d in days) for name in days[0] if name != 'date'}
+    return {"start": start.isoformat(), "end": end.isoformat(), "days": days, "totals": totals}
@@ -1,72 +1,97 @@
 """Dashboard routes blueprint"""
-from flask import Blueprint, render_template
+from flask import Blueprint, Response, render_template, request, current_app
 from flask_login import login_required, current_user
-from app.services import TaskService, GoalService
-from datetime import date, datetime
+from app.services import TaskService, GoalService, AnalyticsService, UserService
+from app.utils.fragments import lazy
+from app.utils.events import events
+from datetime import date
 
 dashboard_bp = Blueprint('dashboard', __name__, url_prefix='')
 
+# Query args understood by TaskService.parse_filters
+FILTER_ARGS = ('status', 'priority', 'goal', 'due_from', 'due_to')
+
 @dashboard_bp.route('/')
 @dashboard_bp.route('/dashboard')
 @login_required
 def index():
     """Display user dashboard with analytics"""
-    tasks = TaskService.get_user_tasks(current_user.id)
-    goals = GoalService.get_user_goals(current_user.id)
-
-    # Calculate progress for each goal
-    for goal in goals:
-        goal.progress = GoalService.get_goal_progress(goal)
-
-    # --- Task Analytics ---
-    total_tasks     = len(tasks)
-    completed_tasks = sum(1 for t in tasks if t.completed)
-    pending_tasks   = total_tasks - completed_tasks
     today = date.today()
-    overdue_tasks   = sum(
-        1 for t in tasks
-        if not t.completed and t.due_date and t.due_date.date() < today
-    )
-    completion_rate = round((completed_tasks / total_tasks * 100) if total_tasks else 0)
-
-    # Priority breakdown (pending only)
-    high_tasks   = sum(1 for t in tasks if not t.completed and t.priority == 'High')
-    medium_tasks = sum(1 for t in tasks if not t.completed and t.priority == 'Medium')
-    low_tasks    = sum(1 for t in tasks if not t.completed and t.priority == 'Low')
+    per_page = current_app.config['TASKS_PER_PAGE']
+    cursor = request.args.get('cursor')
+    try:
+        filters = TaskService.parse_filters(request.args)
+    except ValueError:
+        filters = {}
+    # The same filters as query args (for links) and as part of the fragment key
+    filter_args = {key: request.args[key] for key in FILTER_ARGS if key in request.args}
+    filter_key = '&'.join(f"{k}={v}" for k, v in sorted(filters.items()))
+    # The live stream resumes after the last event this page already reflects
+    last_event_id = events.last_id()
+    # Read the version before any data so a fragment is never cached under a
+    # newer version than the data it was rendered from
+    data_version = UserService.get_data_version(current_user.id)
 
-    # --- Goal Analytics ---
-    total_goals = len(goals)
-    avg_goal_progress = round(
-        sum(g.progress for g in goals) / total_goals if total_goals else 0
-    )
-    goals_on_track  = sum(1 for g in goals if g.progress >= 50)
-    goals_behind    = total_goals - goals_on_track
+    # Aggregates are computed in SQL and cached until the user's data changes
+    analytics, progress_map = AnalyticsService.get_dashboard_analytics(
+        current_user.id, today, data_version)
 
-    # Sort tasks: incomplete first, then by due date (use datetime.max for tasks with no due date)
-    sorted_tasks = sorted(
-        tasks,
-        key=lambda t: (t.completed, t.due_date or datetime.max)
-    )
+    def load_task_page():
+        try:
+            return TaskService.get_task_page(current_user.id, cursor, per_page, filters, today)
+        except ValueError:
+            return TaskService.get_task_page(current_user.id, None, per_page, filters, today)
 
-    analytics = {
-        'total_tasks':      total_tasks,
-        'completed_tasks':  completed_tasks,
-        'pending_tasks':    pending_tasks,
-        'overdue_tasks':    overdue_tasks,
-        'completion_rate':  completion_rate,
-        'high_tasks':       high_tasks,
-        'medium_tasks':     medium_tasks,
-        'low_tasks':        low_tasks,
-        'total_goals':      total_goals,
-        'avg_goal_progress':avg_goal_progress,
-        'goals_on_track':   goals_on_track,
-        'goals_behind':     goals_behind,
-    }
+    def load_goals():
+        goals = GoalService.get_user_goals(current_user.id)
+        for goal in goals:
+            goal.progress = progress_map.get(goal.id, 0)
+        return goals
 
+    # Only queried when a cached fragment that uses them has to re-render
     return render_template(
         'dashboard.html',
-        tasks=sorted_tasks,
-        goals=goals,
+        task_page=lazy(load_task_page),
+        cursor=cursor or '',
+        filters=filters,
+        filter_args=filter_args if filters else {},
+        filter_key=filter_key,
+        goals=lazy(load_goals),
         analytics=analytics,
+        data_version=data_version,
         today=today,
+        live_events=events.enabled,
+        last_event_id=last_event_id,
     )
+
+@dashboard_bp.route('/dashboard/summary')
+@login_required
+def summary():
+    """Stat card numbers and goal progress as JSON, for a live dashboard that has to resync"""
+    today = date.today()
+    event_id = events.last_id()
+    analytics, progress_map = AnalyticsService.get_dashboard_analytics(current_user.id, today)
+    return {"event_id": event_id, "analytics": analytics, "goals": progress_map}
+
+@dashboard_bp.route('/events')
+@login_required
+def live_events():
+    """
+    Server-Sent Events stream of the user's task/goal changes. Resumes
+    after the Last-Event-ID header (on reconnect) or ?last_event_id.
+    """
+    if not events.enabled:
+        # EventSource stops reconnecting on 204
+        return '', 204
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+    body = events.stream(current_user.id, last_event_id)
+    if body is None:
+        # This worker's stream slots are full; keep its threads for requests
+        return '', 204
+    return Response(body,
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
@@ -1,10 +1,45 @@
 """Goal routes blueprint"""
+from datetime import date
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
-from app.services import GoalService
+from app.services import GoalService, AnalyticsService
 
 goals_bp = Blueprint('goals', __name__, url_prefix='/goals')
 
+def _fragment(goal_id, write):
+    """
+    Run write() and answer with the goal's new list item (empty once
+    deleted) and the goal stats, read from the goal counters only
+    """
+    today = date.today()
+    goal = GoalService.get_goal(goal_id)
+    if not goal or goal.user_id != current_user.id:
+        return {"error": "Goal not found"}, 404
+    success, message = write()
+    if not success:
+        return {"error": message}, 400
+    goals, goal_analytics = AnalyticsService.goal_update(current_user.id, today, [goal_id])
+    goal = GoalService.get_goal(goal_id)
+    if goal is not None:
+        goal.progress = goals[goal_id]
+    return {
+        "message": message,
+        "goal_id": goal_id,
+        "html": render_template('_goal_item.html', goal=goal) if goal else '',
+        "goals": goals,
+        "goal_analytics": goal_analytics,
+    }
+
+@goals_bp.route('/<int:goal_id>/item')
+@login_required
+def item(goal_id):
+    """One goal's list item, for a live dashboard update (404 once it is gone)"""
+    goal = GoalService.get_goal(goal_id)
+    if not goal or goal.user_id != current_user.id:
+        return {"error": "Goal not found"}, 404
+    goal.progress = GoalService.get_goal_progress(goal)
+    return render_template('_goal_item.html', goal=goal)
+
 @goals_bp.route('/add', methods=['GET', 'POST'])
 @login_required
 def add():
@@ -39,6 +74,9 @@ def edit(goal_id):
 @goals_bp.route('/<int:goal_id>/complete', methods=['POST'])
 @login_required
 def complete(goal_id):
+    """Toggle a goal (?format=fragment: JSON list item and goal stats instead of a redirect)"""
+    if request.args.get('format') == 'fragment':
+        return _fragment(goal_id, lambda: GoalService.complete_goal(goal_id, current_user.id))
     success, message = GoalService.complete_goal(goal_id, current_user.id)
     flash(message, 'success' if success else 'danger')
     return redirect(url_for('dashboard.index'))
@@ -46,6 +84,9 @@ def complete(goal_id):
 @goals_bp.route('/<int:goal_id>/delete', methods=['POST'])
 @login_required
 def delete(goal_id):
+    """Delete a goal (?format=fragment: JSON goal stats instead of a redirect)"""
+    if request.args.get('format') == 'fragment':
+        return _fragment(goal_id, lambda: GoalService.delete_goal(goal_id, current_user.id))
     success, message = GoalService.delete_goal(goal_id, current_user.id)
     flash(message, 'success' if success else 'danger')
     return redirect(url_for('dashboard.index'))
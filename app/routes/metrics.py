@@ -0,0 +1,19 @@
+"""Prometheus metrics endpoint"""
+import hmac
+from flask import Blueprint, Response, current_app, request, abort
+from app.utils.metrics import metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('/metrics')
+def export():
+    """All workers' metrics in Prometheus text format (Bearer METRICS_TOKEN if set)"""
+    token = current_app.config.get('METRICS_TOKEN')
+    if not metrics.enabled or (not token and current_app.config.get('METRICS_REQUIRE_TOKEN')):
+        abort(404)
+    if token:
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+        if not hmac.compare_digest(supplied.encode(), token.encode()):
+            return {"error": "Invalid metrics token"}, 401
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,7 +1,8 @@
 """Profile / settings routes"""
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
-from app.services import UserService
+from datetime import date
+from app.services import UserService, AnalyticsService
 
 profile_bp = Blueprint('profile', __name__, url_prefix='/profile')
 
@@ -26,4 +27,5 @@ def index():
 
         return redirect(url_for('profile.index'))
 
-    return render_template('profile.html')
+    analytics, _ = AnalyticsService.get_dashboard_analytics(current_user.id, date.today())
+    return render_template('profile.html', analytics=analytics)
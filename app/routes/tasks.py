@@ -1,10 +1,41 @@
 """Task routes blueprint"""
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from datetime import date
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
 from flask_login import login_required, current_user
-from app.services import TaskService, GoalService
+from app.services import TaskService, GoalService, SearchService, AnalyticsService
 
 tasks_bp = Blueprint('tasks', __name__, url_prefix='/tasks')
 
+def _fragment(task_id, write):
+    """
+    Run write() and answer with just what changed: the task's new row
+    (empty once deleted), deltas for the task stat cards, and the new
+    progress of the goals involved. Nothing scales with the user's task count.
+    """
+    today = date.today()
+    task = TaskService.get_task(task_id)
+    if not task or task.user_id != current_user.id:
+        return {"error": "Task not found"}, 404
+    before = TaskService.stat_counts(task, today)
+    goal_ids = {task.goal_id}
+    success, message = write()
+    if not success:
+        return {"error": message}, 400
+    task = TaskService.get_task(task_id)
+    if task is not None:
+        goal_ids.add(task.goal_id)
+    goal_ids.discard(None)
+    goals, goal_analytics = (AnalyticsService.goal_update(current_user.id, today, goal_ids)
+                             if goal_ids else ({}, None))
+    return {
+        "message": message,
+        "task_id": task_id,
+        "html": render_template('_task_rows.html', tasks=[task], today=today) if task else '',
+        "delta": TaskService.stat_delta(before, TaskService.stat_counts(task, today)),
+        "goals": goals,
+        "goal_analytics": goal_analytics,
+    }
+
 @tasks_bp.route('/add', methods=['GET', 'POST'])
 @login_required
 def add():
@@ -25,8 +56,12 @@ def add():
 @tasks_bp.route('/<int:task_id>/edit', methods=['GET', 'POST'])
 @login_required
 def edit(task_id):
+    """Edit form; a POST with ?format=fragment answers with the new row and stat deltas"""
+    fragment = request.method == 'POST' and request.args.get('format') == 'fragment'
     task = TaskService.get_task(task_id)
     if not task or task.user_id != current_user.id:
+        if fragment:
+            return {"error": "Task not found"}, 404
         flash("Task not found", 'danger')
         return redirect(url_for('dashboard.index'))
     if request.method == 'POST':
@@ -35,9 +70,12 @@ def edit(task_id):
         due_date    = request.form.get('due_date', '').strip()
         priority    = request.form.get('priority', 'Medium')
         goal_id     = request.form.get('goal_id', type=int) or None
-        success, message = TaskService.update_task(task_id, current_user.id,
-                                                   title, description, due_date,
-                                                   priority, goal_id)
+        update = lambda: TaskService.update_task(task_id, current_user.id,
+                                                 title, description, due_date,
+                                                 priority, goal_id)
+        if fragment:
+            return _fragment(task_id, update)
+        success, message = update()
         flash(message, 'success' if success else 'danger')
         if success:
             return redirect(url_for('dashboard.index'))
@@ -47,6 +85,9 @@ def edit(task_id):
 @tasks_bp.route('/<int:task_id>/complete', methods=['POST'])
 @login_required
 def complete(task_id):
+    """Mark a task complete (?format=fragment: JSON row and stat deltas instead of a redirect)"""
+    if request.args.get('format') == 'fragment':
+        return _fragment(task_id, lambda: TaskService.complete_task(task_id, current_user.id))
     success, message = TaskService.complete_task(task_id, current_user.id)
     flash(message, 'success' if success else 'danger')
     return redirect(url_for('dashboard.index'))
@@ -54,6 +95,91 @@ def complete(task_id):
 @tasks_bp.route('/<int:task_id>/delete', methods=['POST'])
 @login_required
 def delete(task_id):
+    """Delete a task (?format=fragment: JSON stat deltas instead of a redirect)"""
+    if request.args.get('format') == 'fragment':
+        return _fragment(task_id, lambda: TaskService.delete_task(task_id, current_user.id))
     success, message = TaskService.delete_task(task_id, current_user.id)
     flash(message, 'success' if success else 'danger')
     return redirect(url_for('dashboard.index'))
+
+@tasks_bp.route('/<int:task_id>/row')
+@login_required
+def row(task_id):
+    """One task's table row, for a live dashboard update (404 once it is gone)"""
+    task = TaskService.get_task(task_id)
+    if not task or task.user_id != current_user.id:
+        return {"error": "Task not found"}, 404
+    return render_template('_task_rows.html', tasks=[task], today=date.today())
+
+@tasks_bp.route('/page')
+@login_required
+def page():
+    """
+    Next page of the task listing (JSON, or table rows with ?format=html),
+    optionally filtered by status, priority, goal, due_from and due_to
+    """
+    limit = min(request.args.get('limit', current_app.config['TASKS_PER_PAGE'], type=int), 200)
+    try:
+        filters = TaskService.parse_filters(request.args)
+        tasks, next_cursor = TaskService.get_task_page(
+            current_user.id, request.args.get('cursor'), max(limit, 1), filters)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    if request.args.get('format') == 'html':
+        html = render_template('_task_rows.html', tasks=tasks, today=date.today())
+        return html, 200, {'X-Next-Cursor': next_cursor or ''}
+    return {"tasks": [t.to_dict() for t in tasks], "next_cursor": next_cursor}
+
+@tasks_bp.route('/search')
+@login_required
+def search():
+    """Ranked search results as task table rows (next page cursor in X-Next-Cursor)"""
+    limit = min(max(request.args.get('limit', current_app.config['TASKS_PER_PAGE'], type=int), 1), 200)
+    try:
+        tasks, next_cursor = SearchService.search(
+            current_user.id, request.args.get('q', ''), 'tasks', limit, request.args.get('cursor'))
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    html = render_template('_task_rows.html', tasks=tasks, today=date.today())
+    return html, 200, {'X-Next-Cursor': next_cursor or ''}
+
+@tasks_bp.route('/bulk', methods=['POST'])
+@login_required
+def bulk():
+    """
+    Apply one action to a batch of tasks. Accepts a form (task_ids repeated)
+    or a JSON body {"action", "task_ids", "priority", "goal_id"}.
+    Actions: complete, delete, priority[:High|Medium|Low], goal[:<id>|:none].
+    """
+    data = request.get_json(silent=True) if request.is_json else None
+    if data is not None:
+        task_ids = data.get('task_ids') or []
+        action   = str(data.get('action', ''))
+        extra    = {k: data.get(k) for k in ('priority', 'goal_id')}
+    else:
+        task_ids = request.form.getlist('task_ids')
+        action   = request.form.get('action', '')
+        extra    = {k: request.form.get(k) for k in ('priority', 'goal_id')}
+    action, _, arg = action.partition(':')
+
+    if action == 'complete':
+        count, message = TaskService.bulk_complete(task_ids, current_user.id)
+    elif action == 'delete':
+        count, message = TaskService.bulk_delete(task_ids, current_user.id)
+    elif action == 'priority':
+        count, message = TaskService.bulk_set_priority(
+            task_ids, current_user.id, arg or extra['priority'])
+    elif action == 'goal':
+        goal_id = arg or extra['goal_id']
+        try:
+            goal_id = None if goal_id in (None, '', 'none') else int(goal_id)
+        except (TypeError, ValueError):
+            goal_id = -1
+        count, message = TaskService.bulk_set_goal(task_ids, current_user.id, goal_id)
+    else:
+        count, message = None, "Unknown bulk action"
+
+    if data is not None:
+        return {"updated": count or 0, "message": message}, (200 if count is not None else 400)
+    flash(message, 'success' if count is not None else 'danger')
+    return redirect(url_for('dashboard.index'))
@@ -0,0 +1,60 @@
+"""Data import/export routes blueprint"""
+from flask import (Blueprint, Response, request, redirect, url_for, flash,
+                   stream_with_context, abort)
+from flask_login import login_required, current_user
+from app.services.transfer_service import TransferService, FORMATS
+
+transfer_bp = Blueprint('transfer', __name__, url_prefix='/data')
+
+KINDS = ('tasks', 'goals')
+MIMETYPES = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+@transfer_bp.route('/export/<kind>.<fmt>')
+@login_required
+def export(kind, fmt):
+    """Stream the user's tasks or goals as CSV or NDJSON"""
+    if kind not in KINDS or fmt not in FORMATS:
+        abort(404)
+    lines = TransferService.export_lines(kind, fmt, current_user.id)
+    return Response(
+        stream_with_context(lines),
+        mimetype=MIMETYPES[fmt],
+        headers={'Content-Disposition': f'attachment; filename="performx-{kind}.{fmt}"'},
+    )
+
+@transfer_bp.route('/import/<kind>', methods=['POST'])
+@login_required
+def import_data(kind):
+    """Bulk import an uploaded CSV/NDJSON file of tasks or goals"""
+    if kind not in KINDS:
+        abort(404)
+    upload = request.files.get('file')
+    wants_json = request.accept_mimetypes.best == 'application/json'
+    if not upload or not upload.filename:
+        if wants_json:
+            return {"error": "No file uploaded"}, 400
+        flash("Choose a file to import", 'danger')
+        return redirect(url_for('profile.index'))
+
+    fmt = request.form.get('format') or upload.filename.rsplit('.', 1)[-1].lower()
+    if fmt == 'jsonl':
+        fmt = 'ndjson'
+    if fmt not in FORMATS:
+        if wants_json:
+            return {"error": "Unsupported format, use csv or ndjson"}, 400
+        flash("Unsupported format, use .csv or .ndjson", 'danger')
+        return redirect(url_for('profile.index'))
+
+    records = TransferService.iter_upload(upload.stream, fmt)
+    summary = TransferService.import_records(kind, records, current_user.id)
+    if wants_json:
+        return summary, (200 if summary['completed'] else 500)
+
+    message = f"Imported {summary['imported']} {kind}"
+    if summary['skipped']:
+        first = summary['errors'][0] if summary['errors'] else None
+        message += f", skipped {summary['skipped']}"
+        if first:
+            message += f" (line {first['line']}: {first['error']})"
+    flash(message, 'success' if summary['completed'] and not summary['skipped'] else 'warning')
+    return redirect(url_for('profile.index'))
@@ -2,5 +2,8 @@
 from app.services.user_service import UserService
 from app.services.task_service import TaskService
 from app.services.goal_service import GoalService
+from app.services.stats_service import StatsService
+from app.services.search_service import SearchService
+from app.services.analytics_service import AnalyticsService
 
-__all__ = ['UserService', 'TaskService', 'GoalService']
+__all__ = ['UserService', 'TaskService', 'GoalService', 'StatsService', 'SearchService', 'AnalyticsService']
@@ -0,0 +1,43 @@
+"""Analytics service: cached dashboard aggregates"""
+from app.services.user_service import UserService
+from app.services.task_service import TaskService
+from app.services.goal_service import GoalService
+from app.utils.cache import cache
+
+class AnalyticsService:
+    """Service class for dashboard analytics"""
+
+    @staticmethod
+    def cache_key(user_id, today, version=None):
+        """Key for a user's analytics; changes whenever their data version does"""
+        if version is None:
+            version = UserService.get_data_version(user_id)
+        return f"analytics:{user_id}:v{version}:{today.isoformat()}"
+
+    @staticmethod
+    def compute_dashboard_analytics(user_id, today):
+        """Compute (analytics, progress_map) straight from the database"""
+        progress_map = GoalService.get_progress_map(user_id, today)
+        analytics = TaskService.get_analytics(user_id, today)
+        analytics.update(GoalService.get_analytics(user_id, today, progress_map))
+        return analytics, progress_map
+
+    @staticmethod
+    def get_dashboard_analytics(user_id, today, version=None):
+        """Return (analytics, progress_map), served from cache while the data version is unchanged"""
+        return cache.get_or_set(
+            AnalyticsService.cache_key(user_id, today, version),
+            lambda: AnalyticsService.compute_dashboard_analytics(user_id, today),
+        )
+
+    # ── Partial page updates ──
+
+    @staticmethod
+    def goal_update(user_id, today, goal_ids=()):
+        """
+        ({goal_id: progress or None if gone}, goal analytics) after a write,
+        read from the goal counters only (no task rows are scanned)
+        """
+        progress_map = GoalService.get_progress_map(user_id, today)
+        progress = {goal_id: progress_map.get(goal_id) for goal_id in goal_ids if goal_id is not None}
+        return progress, GoalService.get_analytics(user_id, today, progress_map)
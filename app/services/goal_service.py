@@ -1,12 +1,16 @@
 """Goal service for goal-related operations"""
 from datetime import datetime
-from app.models import db, Goal
-from app.utils.validators import calculate_goal_progress
+from app.models import db, Goal, Task
+from app.services.user_service import UserService
+from app.utils.validators import progress_from_counts
+from app.utils.decorators import retry_on_lock, raise_if_retryable
+from app.utils.events import events
 
 class GoalService:
     """Service class for goal operations"""
 
     @staticmethod
+    @retry_on_lock
     def create_goal(title, description, target_date, user_id):
         if not title:
             return None, "Goal title is required"
@@ -15,23 +19,61 @@ class GoalService:
             new_goal = Goal(title=title, description=description,
                             target_date=target_datetime, user_id=user_id)
             db.session.add(new_goal)
+            UserService.bump_data_version(user_id)
+            GoalService._emit('goal.created', user_id, new_goal.id)
             db.session.commit()
             return new_goal, "Goal created successfully"
         except ValueError:
             return None, "Invalid date format. Use YYYY-MM-DD"
         except Exception as e:
             db.session.rollback()
+            raise_if_retryable(e)
             return None, f"Error creating goal: {str(e)}"
 
     @staticmethod
     def get_user_goals(user_id):
         return Goal.query.filter_by(user_id=user_id).all()
 
+    @staticmethod
+    def get_progress_map(user_id, today=None, goal_ids=None):
+        """Progress for a user's goals (all, or just goal_ids) as {goal_id: progress}, from the goal counters"""
+        query = (db.session.query(Goal.id, Goal.completed, Goal.target_date,
+                                  Goal.task_count, Goal.completed_task_count)
+                 .filter(Goal.user_id == user_id))
+        if goal_ids is not None:
+            query = query.filter(Goal.id.in_(goal_ids))
+        rows = query.all()
+        return {
+            goal_id: 100 if completed else progress_from_counts(total, done, target_date, today)
+            for goal_id, completed, target_date, total, done in rows
+        }
+
+    @staticmethod
+    def get_analytics(user_id, today, progress_map=None):
+        """Goal analytics for the dashboard, reusing a progress map when one is supplied"""
+        if progress_map is None:
+            progress_map = GoalService.get_progress_map(user_id, today)
+        progress       = list(progress_map.values())
+        total_goals    = len(progress)
+        goals_on_track = sum(1 for p in progress if p >= 50)
+        return {
+            'total_goals':       total_goals,
+            'avg_goal_progress': round(sum(progress) / total_goals if total_goals else 0),
+            'goals_on_track':    goals_on_track,
+            'goals_behind':      total_goals - goals_on_track,
+        }
+
     @staticmethod
     def get_goal(goal_id):
         return Goal.query.get(goal_id)
 
     @staticmethod
+    def user_owns_goal(goal_id, user_id):
+        """True if goal_id is one of the user's goals"""
+        return db.session.query(Goal.id).filter(Goal.id == goal_id, Goal.user_id == user_id).first() is not None
+
+    @staticmethod
+    @retry_on_lock
     def update_goal(goal_id, user_id, title, description, target_date):
         """Update an existing goal"""
         goal = Goal.query.get(goal_id)
@@ -45,15 +87,19 @@ class GoalService:
             goal.title       = title
             goal.description = description
             goal.target_date = datetime.strptime(target_date, '%Y-%m-%d') if target_date else None
+            UserService.bump_data_version(user_id)
+            GoalService._emit('goal.updated', user_id, goal_id)
             db.session.commit()
             return True, "Goal updated successfully"
         except ValueError:
             return False, "Invalid date format"
         except Exception as e:
             db.session.rollback()
+            raise_if_retryable(e)
             return False, f"Error updating goal: {str(e)}"
 
     @staticmethod
+    @retry_on_lock
     def complete_goal(goal_id, user_id):
         """Toggle goal completion"""
         goal = Goal.query.get(goal_id)
@@ -63,14 +109,18 @@ class GoalService:
             return False, "Not authorized"
         try:
             goal.completed = not goal.completed
+            UserService.bump_data_version(user_id)
+            GoalService._emit('goal.completed' if goal.completed else 'goal.reopened', user_id, goal_id)
             db.session.commit()
             status = "marked as complete" if goal.completed else "reopened"
             return True, f"Goal {status}"
         except Exception as e:
             db.session.rollback()
+            raise_if_retryable(e)
             return False, f"Error: {str(e)}"
 
     @staticmethod
+    @retry_on_lock
     def delete_goal(goal_id, user_id):
         goal = Goal.query.get(goal_id)
         if not goal:
@@ -79,14 +129,84 @@ class GoalService:
             return False, "Not authorized to delete this goal"
         try:
             db.session.delete(goal)
+            UserService.bump_data_version(user_id)
+            GoalService._emit('goal.deleted', user_id, goal_id, deleted=True)
             db.session.commit()
             return True, "Goal deleted successfully"
         except Exception as e:
             db.session.rollback()
+            raise_if_retryable(e)
             return False, f"Error deleting goal: {str(e)}"
 
+    @staticmethod
+    def _emit(type, user_id, goal_id, deleted=False):
+        """Live dashboard event for a goal write (sent on commit) with its new progress"""
+        if not events.enabled:
+            return
+        progress = None if deleted else GoalService.get_progress_map(user_id, goal_ids=[goal_id]).get(goal_id)
+        events.emit(user_id, type, goal_id=goal_id, goals={goal_id: progress})
+
     @staticmethod
     def get_goal_progress(goal):
         if goal.completed:
             return 100
-        return calculate_goal_progress(goal)
+        return progress_from_counts(goal.task_count, goal.completed_task_count, goal.target_date)
+
+    # ── Task counters (goal.task_count / goal.completed_task_count) ──
+
+    @staticmethod
+    def adjust_task_counts(goal_id, total=0, completed=0):
+        """
+        Add deltas to a goal's task counters as a single UPDATE in the
+        caller's transaction (the caller commits). No-op without a goal.
+        """
+        if goal_id is None or not (total or completed):
+            return
+        db.session.execute(
+            db.update(Goal)
+            .where(Goal.id == goal_id)
+            .values(task_count=Goal.task_count + total,
+                    completed_task_count=Goal.completed_task_count + completed)
+            .execution_options(synchronize_session=False))
+
+    @staticmethod
+    def tally_tasks(query):
+        """{goal_id: (total, completed)} over the tasks matched by a Task query (None: unlinked)"""
+        rows = (query.with_entities(Task.goal_id, db.func.count(Task.id),
+                               db.func.coalesce(db.func.sum(
+                                   db.case((Task.completed.is_(True), 1), else_=0)), 0))
+                .group_by(Task.goal_id)
+                .all())
+        return {goal_id: (int(total), int(done)) for goal_id, total, done in rows}
+
+    @staticmethod
+    @retry_on_lock
+    def reconcile_task_counts(fix=True):
+        """
+        Recompute every goal's task counters from the task table in one
+        grouped query and compare with the stored values. With fix, drifted
+        rows are rewritten in one bulk UPDATE (and their owners' data
+        versions bumped). Returns [(goal_id, user_id, stored, actual)] with
+        stored/actual as (task_count, completed_task_count) pairs.
+        """
+        actual = GoalService.tally_tasks(Task.query)
+        drift = []
+        stored = db.session.query(Goal.id, Goal.user_id, Goal.task_count,
+                                  Goal.completed_task_count)
+        for goal_id, user_id, total, done in stored:
+            counts = actual.get(goal_id, (0, 0))
+            if (total, done) != counts:
+                drift.append((goal_id, user_id, (total, done), counts))
+        if fix and drift:
+            try:
+                db.session.execute(db.update(Goal), [
+                    {'id': goal_id, 'task_count': counts[0], 'completed_task_count': counts[1]}
+                    for goal_id, _, _, counts in drift
+                ])
+                for user_id in {user_id for _, user_id, _, _ in drift}:
+                    UserService.bump_data_version(user_id)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+        return drift
@@ -0,0 +1,213 @@
+"""Stats service: the daily_stats rollup behind the trends endpoint"""
+from collections import Counter, defaultdict
+from datetime import date, datetime, time, timedelta
+from app.models import db, Task, User, DailyStat
+from app.utils.decorators import retry_on_lock
+
+PRIORITY_COUNTERS = {'High': 'completed_high', 'Medium': 'completed_medium', 'Low': 'completed_low'}
+# Rows per INSERT while rebuilding
+BACKFILL_CHUNK_SIZE = 1000
+
+
+def _as_date(value):
+    """date() comes back as a string from SQLite and as a date from Postgres"""
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    return value
+
+
+class StatsService:
+    """
+    Service class for the daily_stats rollup.
+
+    A task contributes `created` on the day it was created and, once
+    done, `completed` plus its priority counter (and `completed_overdue`
+    if it was finished after its due date) on the day it was completed.
+    Writers compute the change in contribution and call apply() in their
+    own transaction, so the rollup always equals what rebuild() would
+    derive from the task table.
+
+    Deliberately not tracked:
+    - "Tasks overdue on day D" depends on the calendar, not on writes: a
+      task becomes overdue at midnight without any write. Keeping it would
+      take a daily job that scans every open task, which is the scan the
+      rollup exists to avoid. The rollup records `completed_overdue` (late
+      completions) instead, which writes do determine. The current overdue
+      count is still on the dashboard.
+    - Priorities are counted for completions only, since the trend is what
+      got done at each priority. Created-per-priority counters would need
+      the same upkeep on every priority edit, and nothing reads them.
+    """
+
+    @staticmethod
+    def contribution(task):
+        """{day: Counter} a single task adds to its owner's rollup"""
+        deltas = defaultdict(Counter)
+        if task.created_at:
+            deltas[task.created_at.date()]['created'] += 1
+        if task.completed and task.completed_at:
+            day = task.completed_at.date()
+            deltas[day]['completed'] += 1
+            if task.priority in PRIORITY_COUNTERS:
+                deltas[day][PRIORITY_COUNTERS[task.priority]] += 1
+            if task.due_date and task.due_date.date() < day:
+                deltas[day]['completed_overdue'] += 1
+        return deltas
+
+    @staticmethod
+    def diff(before, after):
+        """after - before, for two contribution() results"""
+        deltas = defaultdict(Counter)
+        for day, counts in after.items():
+            deltas[day].update(counts)
+        for day, counts in before.items():
+            deltas[day].subtract(counts)
+        return deltas
+
+    @staticmethod
+    def apply(user_id, deltas):
+        """
+        Add {day: Counter} deltas to a user's rollup rows, one upsert per
+        day touched. Runs in the caller's transaction (the caller commits).
+        """
+        for day, counts in deltas.items():
+            values = {name: n for name, n in counts.items() if n}
+            if not values:
+                continue
+            updated = db.session.execute(
+                db.update(DailyStat)
+                .where(DailyStat.user_id == user_id, DailyStat.day == day)
+                .values({name: getattr(DailyStat, name) + n for name, n in values.items()})
+                .execution_options(synchronize_session=False))
+            if not updated.rowcount:
+                db.session.execute(db.insert(DailyStat).values(user_id=user_id, day=day, **values))
+
+    # ── Grouped deltas for bulk writes and rebuilds ──
+
+    @staticmethod
+    def _created_rows(query):
+        return (query.filter(Task.created_at.isnot(None))
+                .with_entities(Task.user_id, db.func.date(Task.created_at), db.func.count(Task.id))
+                .group_by(Task.user_id, db.func.date(Task.created_at))
+                .all())
+
+    @staticmethod
+    def _completed_rows(query):
+        completed_day = db.func.date(Task.completed_at)
+        overdue = db.case((db.func.date(Task.due_date) < completed_day, 1), else_=0)
+        return (query.filter(Task.completed.is_(True), Task.completed_at.isnot(None))
+                .with_entities(Task.user_id, completed_day, Task.priority, overdue,
+                               db.func.count(Task.id))
+                .group_by(Task.user_id, completed_day, Task.priority, overdue)
+                .all())
+
+    @staticmethod
+    def tally(query, sign=1):
+        """{(user_id, day): Counter} contributed by every task a Task query matches, times sign"""
+        deltas = defaultdict(Counter)
+        for user_id, day, n in StatsService._created_rows(query):
+            deltas[user_id, _as_date(day)]['created'] += sign * n
+        for user_id, day, priority, overdue, n in StatsService._completed_rows(query):
+            counts = deltas[user_id, _as_date(day)]
+            counts['completed'] += sign * n
+            if priority in PRIORITY_COUNTERS:
+                counts[PRIORITY_COUNTERS[priority]] += sign * n
+            if overdue:
+                counts['completed_overdue'] += sign * n
+        return deltas
+
+    @staticmethod
+    def apply_tally(deltas):
+        """apply() a tally() result, which may span several users"""
+        by_user = defaultdict(dict)
+        for (user_id, day), counts in deltas.items():
+            by_user[user_id][day] = counts
+        for user_id, days in by_user.items():
+            StatsService.apply(user_id, days)
+
+    @staticmethod
+    def completion(query, when):
+        """{(user_id, day): Counter} for completing a query's open tasks at `when`"""
+        day = when.date()
+        overdue = db.case((Task.due_date < datetime.combine(day, time.min), 1), else_=0)
+        rows = (query.filter(Task.completed.isnot(True))
+                .with_entities(Task.user_id, Task.priority, overdue, db.func.count(Task.id))
+                .group_by(Task.user_id, Task.priority, overdue)
+                .all())
+        deltas = defaultdict(Counter)
+        for user_id, priority, is_overdue, n in rows:
+            counts = deltas[user_id, day]
+            counts['completed'] += n
+            if priority in PRIORITY_COUNTERS:
+                counts[PRIORITY_COUNTERS[priority]] += n
+            if is_overdue:
+                counts['completed_overdue'] += n
+        return deltas
+
+    @staticmethod
+    def priority_change(query, priority):
+        """{(user_id, day): Counter} for moving a query's completed tasks to another priority"""
+        deltas = defaultdict(Counter)
+        for user_id, day, old, _, n in StatsService._completed_rows(
+                query.filter(Task.priority != priority)):
+            counts = deltas[user_id, _as_date(day)]
+            if old in PRIORITY_COUNTERS:
+                counts[PRIORITY_COUNTERS[old]] -= n
+            counts[PRIORITY_COUNTERS[priority]] += n
+        return deltas
+
+    @staticmethod
+    @retry_on_lock
+    def rebuild(user_id=None):
+        """
+        Recompute the rollup from the task table (for one user or everyone)
+        with two grouped queries, replacing the existing rows.
+        Returns the number of rows written.
+        """
+        query = Task.query
+        existing = db.delete(DailyStat)
+        if user_id is not None:
+            query = query.filter(Task.user_id == user_id)
+            existing = existing.where(DailyStat.user_id == user_id)
+        try:
+            rows = [{**dict.fromkeys(DailyStat.COUNTERS, 0), **counts, 'user_id': uid, 'day': day}
+                    for (uid, day), counts in sorted(StatsService.tally(query).items())]
+            db.session.execute(existing)
+            for i in range(0, len(rows), BACKFILL_CHUNK_SIZE):
+                db.session.execute(db.insert(DailyStat), rows[i:i + BACKFILL_CHUNK_SIZE])
+            # Trends responses are tagged with the data version; drop those ETags
+            bump = db.update(User).values(data_version=db.func.coalesce(User.data_version, 0) + 1)
+            if user_id is not None:
+                bump = bump.where(User.id == user_id)
+            db.session.execute(bump.execution_options(synchronize_session=False))
+            db.session.commit()
+            return len(rows)
+        except Exception:
+            db.session.rollback()
+            raise
+
+    # ── Reads ──
+
+    @staticmethod
+    def get_daily_stats(user_id, start, end):
+        """
+        One dict per day from start to end inclusive (days without
+        activity are zero-filled), read from the rollup only.
+        """
+        rows = {row.day: row for row in DailyStat.query.filter(
+            DailyStat.user_id == user_id, DailyStat.day >= start, DailyStat.day <= end)}
+        series = []
+        day = start
+        while day <= end:
+            row = rows.get(day)
+            if row is not None:
+                series.append(row.to_dict())
+            else:
+                series.append({'date': day.strftime('%Y-%m-%d'), **dict.fromkeys(DailyStat.COUNTERS, 0)})
+            day += timedelta(days=1)
+        return series
+
+    @staticmethod
+    def now():
+        """Timestamp for created_at/completed_at (local time, like date.today())"""
+        return datetime.now().replace(microsecond=0)
@@ -1,37 +1,245 @@
 """Task service for task-related operations"""
-from datetime import datetime
+from datetime import date, datetime, time, timedelta
 from app.models import db, Task
+from app.services.user_service import UserService
+from app.services.goal_service import GoalService
+from app.services.stats_service import StatsService
+from app.utils.pagination import encode_task_cursor, decode_task_cursor
+from app.utils.decorators import retry_on_lock, raise_if_retryable
+from app.utils.events import events
+
+PRIORITIES = ('High', 'Medium', 'Low')
+# Listing status filters; overdue and pending (not yet overdue) are both incomplete
+TASK_STATUSES = ('pending', 'overdue', 'completed')
+# Ids per IN (...) clause, well under SQLite's bound-parameter limit
+BULK_CHUNK_SIZE = 500
+# Counters of get_analytics() that a single task moves
+STAT_COUNTERS = ('total_tasks', 'completed_tasks', 'pending_tasks', 'overdue_tasks',
+                 'high_tasks', 'medium_tasks', 'low_tasks')
 
 class TaskService:
     """Service class for task operations"""
     
     @staticmethod
+    @retry_on_lock
     def create_task(title, description, due_date, user_id, goal_id=None, priority='Medium'):
         """Create a new task"""
         if not title:
             return None, "Task title is required"
+        if priority not in PRIORITIES:
+            return None, "Invalid priority"
+        if goal_id is not None and not GoalService.user_owns_goal(goal_id, user_id):
+            return None, "Goal not found"
         try:
             due_datetime = datetime.strptime(due_date, '%Y-%m-%d') if due_date else None
             new_task = Task(title=title, description=description, due_date=due_datetime,
-                            user_id=user_id, goal_id=goal_id, priority=priority)
+                            user_id=user_id, goal_id=goal_id, priority=priority,
+                            created_at=StatsService.now())
             db.session.add(new_task)
+            GoalService.adjust_task_counts(goal_id, total=1)
+            StatsService.apply(user_id, StatsService.contribution(new_task))
+            UserService.bump_data_version(user_id)
+            TaskService._emit('task.created', user_id, new_task.id,
+                              TaskService.stat_counts(None), new_task, [goal_id])
             db.session.commit()
             return new_task, "Task created successfully"
         except ValueError:
             return None, "Invalid date format. Use YYYY-MM-DD"
         except Exception as e:
             db.session.rollback()
+            raise_if_retryable(e)
             return None, f"Error creating task: {str(e)}"
 
     @staticmethod
     def get_user_tasks(user_id):
         return Task.query.filter_by(user_id=user_id).all()
 
+    @staticmethod
+    def parse_filters(params):
+        """
+        Listing filters from request args: status (pending|completed|overdue),
+        priority, goal (a goal id or 'none'), due_from / due_to (YYYY-MM-DD).
+        Blank values are ignored. Raises ValueError for an invalid value.
+        """
+        filters = {}
+        status = (params.get('status') or '').strip()
+        if status and status != 'all':
+            if status not in TASK_STATUSES:
+                raise ValueError(f"Invalid status '{status}'")
+            filters['status'] = status
+        priority = (params.get('priority') or '').strip()
+        if priority and priority != 'all':
+            if priority not in PRIORITIES:
+                raise ValueError(f"Invalid priority '{priority}'")
+            filters['priority'] = priority
+        goal = (params.get('goal') or '').strip()
+        if goal and goal != 'all':
+            if goal == 'none':
+                filters['goal_id'] = None
+            else:
+                try:
+                    filters['goal_id'] = int(goal)
+                except ValueError:
+                    raise ValueError(f"Invalid goal '{goal}'") from None
+        for key in ('due_from', 'due_to'):
+            value = (params.get(key) or '').strip()
+            if value:
+                try:
+                    filters[key] = datetime.strptime(value, '%Y-%m-%d').date()
+                except ValueError:
+                    raise ValueError(f"Invalid {key} '{value}', use YYYY-MM-DD") from None
+        return filters
+
+    @staticmethod
+    def get_task_page(user_id, cursor=None, limit=50, filters=None, today=None):
+        """
+        One page of tasks in dashboard order: incomplete first, then by due
+        date (undated last), then id. Returns (tasks, next_cursor).
+
+        Keyset pagination: each (completed, dated/undated) segment is read as
+        an index range scan on ix_task_user_completed_due seeking past the
+        cursor, so a deep page costs the same as the first one.
+
+        filters (see parse_filters) become predicates on the same scans:
+        status and the due-date range select segments and bound due_date,
+        and a priority filter switches to ix_task_user_completed_priority_due,
+        so e.g. overdue High tasks are one range scan.
+        Raises ValueError for a malformed cursor.
+        """
+        filters = filters or {}
+        day_start = datetime.combine(today or date.today(), time.min)
+        after = decode_task_cursor(cursor)
+        if cursor and after is None:
+            raise ValueError("Invalid cursor")
+
+        segments = [(False, False), (False, True), (True, False), (True, True)]
+        status = filters.get('status')
+        if status:
+            segments = [seg for seg in segments if seg[0] == (status == 'completed')]
+        if status == 'overdue' or 'due_from' in filters or 'due_to' in filters:
+            segments = [seg for seg in segments if not seg[1]]
+        start = 0
+        if after:
+            if (after[0], after[1] is None) not in segments:
+                raise ValueError("Invalid cursor")
+            start = segments.index((after[0], after[1] is None))
+
+        tasks = []
+        for completed, undated in segments[start:]:
+            remaining = limit + 1 - len(tasks)
+            if remaining <= 0:
+                break
+            query = Task.query.filter(Task.user_id == user_id, Task.completed == completed)
+            if 'priority' in filters:
+                query = query.filter(Task.priority == filters['priority'])
+            if 'goal_id' in filters:
+                goal_id = filters['goal_id']
+                query = query.filter(Task.goal_id.is_(None) if goal_id is None
+                                     else Task.goal_id == goal_id)
+            if undated:
+                query = query.filter(Task.due_date.is_(None)).order_by(Task.id)
+            else:
+                query = query.filter(Task.due_date.isnot(None)).order_by(Task.due_date, Task.id)
+                if status == 'overdue':
+                    query = query.filter(Task.due_date < day_start)
+                elif status == 'pending':
+                    query = query.filter(Task.due_date >= day_start)
+                if 'due_from' in filters:
+                    query = query.filter(
+                        Task.due_date >= datetime.combine(filters['due_from'], time.min))
+                if 'due_to' in filters:
+                    query = query.filter(
+                        Task.due_date < datetime.combine(filters['due_to'] + timedelta(days=1), time.min))
+
+            # Seek past the cursor only within the segment it points into
+            if after and (completed, undated) == segments[start]:
+                _, due, last_id = after
+                if undated:
+                    query = query.filter(Task.id > last_id)
+                else:
+                    query = query.filter(db.or_(
+                        Task.due_date > due,
+                        db.and_(Task.due_date == due, Task.id > last_id),
+                    ))
+            tasks.extend(query.limit(remaining).all())
+
+        next_cursor = encode_task_cursor(tasks[limit - 1]) if len(tasks) > limit else None
+        return tasks[:limit], next_cursor
+
+    @staticmethod
+    def get_analytics(user_id, today):
+        """Task analytics for the dashboard, computed in a single aggregate query"""
+        day_start = datetime.combine(today, time.min)
+        is_done   = Task.completed.is_(True)
+        is_open   = Task.completed.isnot(True)
+
+        def count_if(*conditions):
+            return db.func.coalesce(
+                db.func.sum(db.case((db.and_(*conditions), 1), else_=0)), 0)
+
+        row = db.session.query(
+            db.func.count(Task.id),
+            count_if(is_done),
+            count_if(is_open, Task.due_date < day_start),
+            count_if(is_open, Task.priority == 'High'),
+            count_if(is_open, Task.priority == 'Medium'),
+            count_if(is_open, Task.priority == 'Low'),
+        ).filter(Task.user_id == user_id).one()
+
+        total, completed, overdue, high, medium, low = (int(v or 0) for v in row)
+        return {
+            'total_tasks':     total,
+            'completed_tasks': completed,
+            'pending_tasks':   total - completed,
+            'overdue_tasks':   overdue,
+            'completion_rate': round((completed / total * 100) if total else 0),
+            'high_tasks':      high,
+            'medium_tasks':    medium,
+            'low_tasks':       low,
+        }
+
+    @staticmethod
+    def stat_counts(task, today=None):
+        """What a single task (or None) contributes to the counters of get_analytics()"""
+        counts = dict.fromkeys(STAT_COUNTERS, 0)
+        if task is None:
+            return counts
+        counts['total_tasks'] = 1
+        if task.completed:
+            counts['completed_tasks'] = 1
+            return counts
+        counts['pending_tasks'] = 1
+        if task.due_date and task.due_date.date() < (today or date.today()):
+            counts['overdue_tasks'] = 1
+        key = f"{(task.priority or '').lower()}_tasks"
+        if key in counts:
+            counts[key] = 1
+        return counts
+
+    @staticmethod
+    def stat_delta(before, after):
+        """after - before, for two stat_counts() results"""
+        return {name: after[name] - before[name] for name in STAT_COUNTERS}
+
+    @staticmethod
+    def _emit(type, user_id, task_id, before, task, goal_ids):
+        """
+        Live dashboard event for a single-task write (sent on commit): the
+        stat card delta and the new progress of the goals involved
+        """
+        if not events.enabled:
+            return
+        goal_ids = sorted({goal_id for goal_id in goal_ids if goal_id is not None})
+        events.emit(user_id, type, task_id=task_id,
+                    delta=TaskService.stat_delta(before, TaskService.stat_counts(task)),
+                    goals=GoalService.get_progress_map(user_id, goal_ids=goal_ids) if goal_ids else {})
+
     @staticmethod
     def get_task(task_id):
         return Task.query.get(task_id)
 
     @staticmethod
+    @retry_on_lock
     def update_task(task_id, user_id, title, description, due_date, priority, goal_id=None):
         """Update an existing task"""
         task = Task.query.get(task_id)
@@ -41,21 +249,38 @@ class TaskService:
             return False, "Not authorized"
         if not title:
             return False, "Title is required"
+        if priority not in PRIORITIES:
+            return False, "Invalid priority"
+        if goal_id is not None and not GoalService.user_owns_goal(goal_id, user_id):
+            return False, "Goal not found"
         try:
+            due_datetime = datetime.strptime(due_date, '%Y-%m-%d') if due_date else None
+            counts = TaskService.stat_counts(task)
+            old_goal_id = task.goal_id
+            if goal_id != task.goal_id:
+                done = 1 if task.completed else 0
+                GoalService.adjust_task_counts(task.goal_id, total=-1, completed=-done)
+                GoalService.adjust_task_counts(goal_id, total=1, completed=done)
+            before = StatsService.contribution(task)
             task.title       = title
             task.description = description
             task.priority    = priority
             task.goal_id     = goal_id
-            task.due_date    = datetime.strptime(due_date, '%Y-%m-%d') if due_date else None
+            task.due_date    = due_datetime
+            StatsService.apply(user_id, StatsService.diff(before, StatsService.contribution(task)))
+            UserService.bump_data_version(user_id)
+            TaskService._emit('task.updated', user_id, task_id, counts, task, [old_goal_id, goal_id])
             db.session.commit()
             return True, "Task updated successfully"
         except ValueError:
             return False, "Invalid date format"
         except Exception as e:
             db.session.rollback()
+            raise_if_retryable(e)
             return False, f"Error updating task: {str(e)}"
 
     @staticmethod
+    @retry_on_lock
     def complete_task(task_id, user_id):
         """Mark task as complete"""
         task = Task.query.get(task_id)
@@ -64,14 +289,24 @@ class TaskService:
         if task.user_id != user_id:
             return False, "Not authorized to complete this task"
         try:
-            task.completed = True
+            counts = TaskService.stat_counts(task)
+            if not task.completed:
+                GoalService.adjust_task_counts(task.goal_id, completed=1)
+                before = StatsService.contribution(task)
+                task.completed    = True
+                task.completed_at = StatsService.now()
+                StatsService.apply(user_id, StatsService.diff(before, StatsService.contribution(task)))
+            UserService.bump_data_version(user_id)
+            TaskService._emit('task.completed', user_id, task_id, counts, task, [task.goal_id])
             db.session.commit()
             return True, "Task marked as complete"
         except Exception as e:
             db.session.rollback()
+            raise_if_retryable(e)
             return False, f"Error completing task: {str(e)}"
 
     @staticmethod
+    @retry_on_lock
     def delete_task(task_id, user_id):
         """Delete a task"""
         task = Task.query.get(task_id)
@@ -80,9 +315,112 @@ class TaskService:
         if task.user_id != user_id:
             return False, "Not authorized to delete this task"
         try:
+            GoalService.adjust_task_counts(task.goal_id, total=-1,
+                                           completed=-1 if task.completed else 0)
+            StatsService.apply(user_id, StatsService.diff(StatsService.contribution(task), {}))
             db.session.delete(task)
+            UserService.bump_data_version(user_id)
+            TaskService._emit('task.deleted', user_id, task_id,
+                              TaskService.stat_counts(task), None, [task.goal_id])
             db.session.commit()
             return True, "Task deleted successfully"
         except Exception as e:
             db.session.rollback()
+            raise_if_retryable(e)
             return False, f"Error deleting task: {str(e)}"
+
+    # ── Bulk operations: one ownership-filtered statement per chunk, one commit ──
+
+    @staticmethod
+    def _clean_ids(task_ids):
+        ids = set()
+        for task_id in task_ids or []:
+            try:
+                ids.add(int(task_id))
+            except (TypeError, ValueError):
+                continue
+        return sorted(ids)
+
+    @staticmethod
+    def _bulk_apply(task_ids, user_id, apply, verb):
+        """Run apply(query) over chunks of the user's tasks in one transaction"""
+        ids = TaskService._clean_ids(task_ids)
+        if not ids:
+            return None, "No tasks selected"
+        try:
+            count = 0
+            for i in range(0, len(ids), BULK_CHUNK_SIZE):
+                chunk = ids[i:i + BULK_CHUNK_SIZE]
+                query = Task.query.filter(Task.user_id == user_id, Task.id.in_(chunk))
+                count += apply(query)
+            # The statements skip session synchronisation: drop loaded tasks
+            # so nothing later in this request sees deleted or stale rows
+            db.session.expire_all()
+            if count:
+                UserService.bump_data_version(user_id)
+                events.emit(user_id, 'tasks.bulk', count=count)
+            db.session.commit()
+            return count, f"{count} task{'s' if count != 1 else ''} {verb}"
+        except Exception as e:
+            db.session.rollback()
+            raise_if_retryable(e)
+            return None, f"Error updating tasks: {str(e)}"
+
+    @staticmethod
+    @retry_on_lock
+    def bulk_complete(task_ids, user_id):
+        """Mark many tasks complete. Returns (count or None, message)"""
+        def apply(query):
+            now = StatsService.now()
+            for goal_id, (total, _) in GoalService.tally_tasks(
+                    query.filter(Task.completed.isnot(True))).items():
+                GoalService.adjust_task_counts(goal_id, completed=total)
+            StatsService.apply_tally(StatsService.completion(query, now))
+            return query.update({
+                Task.completed:    True,
+                Task.completed_at: db.case((Task.completed.is_(True), Task.completed_at), else_=now),
+            }, synchronize_session=False)
+        return TaskService._bulk_apply(task_ids, user_id, apply, "marked as complete")
+
+    @staticmethod
+    @retry_on_lock
+    def bulk_delete(task_ids, user_id):
+        """Delete many tasks. Returns (count or None, message)"""
+        def apply(query):
+            for goal_id, (total, done) in GoalService.tally_tasks(query).items():
+                GoalService.adjust_task_counts(goal_id, total=-total, completed=-done)
+            StatsService.apply_tally(StatsService.tally(query, sign=-1))
+            return query.delete(synchronize_session=False)
+        return TaskService._bulk_apply(task_ids, user_id, apply, "deleted")
+
+    @staticmethod
+    @retry_on_lock
+    def bulk_set_priority(task_ids, user_id, priority):
+        """Set the priority of many tasks. Returns (count or None, message)"""
+        if priority not in PRIORITIES:
+            return None, "Invalid priority"
+        def apply(query):
+            StatsService.apply_tally(StatsService.priority_change(query, priority))
+            return query.update({Task.priority: priority}, synchronize_session=False)
+        return TaskService._bulk_apply(task_ids, user_id, apply, f"set to {priority} priority")
+
+    @staticmethod
+    @retry_on_lock
+    def bulk_set_goal(task_ids, user_id, goal_id=None):
+        """Link many tasks to one of the user's goals (None unlinks). Returns (count or None, message)"""
+        if goal_id is not None and not GoalService.user_owns_goal(goal_id, user_id):
+            return None, "Goal not found"
+
+        def apply(query):
+            moving = query
+            if goal_id is not None:
+                moving = query.filter(db.or_(Task.goal_id.is_(None), Task.goal_id != goal_id))
+            moved = GoalService.tally_tasks(moving)
+            for old_goal_id, (total, done) in moved.items():
+                GoalService.adjust_task_counts(old_goal_id, total=-total, completed=-done)
+            GoalService.adjust_task_counts(goal_id, total=sum(t for t, _ in moved.values()),
+                                           completed=sum(d for _, d in moved.values()))
+            return query.update({Task.goal_id: goal_id}, synchronize_session=False)
+        return TaskService._bulk_apply(
+            task_ids, user_id, apply,
+            "moved to goal" if goal_id else "unlinked from their goal")
@@ -0,0 +1,249 @@
+"""Transfer service: streaming export and chunked bulk import of tasks/goals"""
+import io
+import csv
+import json
+from datetime import datetime
+from app.models import db, Task, Goal
+from app.services.user_service import UserService
+from app.services.goal_service import GoalService
+from app.services.stats_service import StatsService
+from app.services.task_service import PRIORITIES
+from app.utils.decorators import retry_on_lock
+from app.utils.events import events
+
+TASK_FIELDS = ['id', 'title', 'description', 'due_date', 'priority', 'completed',
+               'goal_id', 'goal_title']
+GOAL_FIELDS = ['id', 'title', 'description', 'target_date', 'completed']
+FORMATS = ('csv', 'ndjson')
+
+# Rows fetched per round-trip while exporting / inserted per transaction while importing
+EXPORT_BATCH_SIZE = 1000
+IMPORT_CHUNK_SIZE = 1000
+# Row errors reported back to the caller (the rest are only counted)
+MAX_REPORTED_ERRORS = 50
+
+_TRUE_VALUES = {'1', 'true', 'yes', 'y', 't'}
+
+
+class ImportRowError(ValueError):
+    """A row failed validation"""
+
+
+class TransferService:
+    """Service class for data import/export"""
+
+    # ── Export ──
+
+    @staticmethod
+    def iter_records(kind, user_id):
+        """Yield the user's tasks or goals as dicts, EXPORT_BATCH_SIZE rows at a time"""
+        if kind == 'tasks':
+            stmt = (db.select(Task.id, Task.title, Task.description, Task.due_date,
+                              Task.priority, Task.completed, Task.goal_id,
+                              Goal.title.label('goal_title'))
+                    .outerjoin(Goal, Goal.id == Task.goal_id)
+                    .where(Task.user_id == user_id)
+                    .order_by(Task.id))
+        else:
+            stmt = (db.select(Goal.id, Goal.title, Goal.description,
+                              Goal.target_date, Goal.completed)
+                    .where(Goal.user_id == user_id)
+                    .order_by(Goal.id))
+        result = db.session.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for row in result:
+            record = dict(row._mapping)
+            for key in ('due_date', 'target_date'):
+                if record.get(key):
+                    record[key] = record[key].strftime('%Y-%m-%d')
+            record['completed'] = bool(record['completed'])
+            yield record
+
+    @staticmethod
+    def export_lines(kind, fmt, user_id):
+        """Generator of output chunks, EXPORT_BATCH_SIZE records per chunk"""
+        records = TransferService.iter_records(kind, user_id)
+        buffer = io.StringIO()
+        if fmt == 'ndjson':
+            write = lambda record: buffer.write(json.dumps(record, ensure_ascii=False) + '\n')
+        else:
+            fields = TASK_FIELDS if kind == 'tasks' else GOAL_FIELDS
+            writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction='ignore')
+            writer.writeheader()
+            write = writer.writerow
+
+        for i, record in enumerate(records, 1):
+            write(record)
+            if i % EXPORT_BATCH_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    # ── Import ──
+
+    @staticmethod
+    def iter_upload(stream, fmt):
+        """Yield (line_number, dict) from a binary upload stream without reading it all"""
+        text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+        if fmt == 'ndjson':
+            for line_no, line in enumerate(text, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    yield line_no, None
+                    continue
+                yield line_no, record if isinstance(record, dict) else None
+        else:
+            reader = csv.DictReader(text)
+            for record in reader:
+                yield reader.line_num, record
+
+    @staticmethod
+    def import_records(kind, records, user_id):
+        """
+        Validate and insert (line_number, dict) records in chunks of
+        IMPORT_CHUNK_SIZE, one executemany INSERT and one commit per chunk.
+        Invalid rows are skipped; a chunk that fails to insert stops the
+        import (earlier chunks stay committed). Returns a summary dict.
+        """
+        summary = {'imported': 0, 'skipped': 0, 'errors': [], 'completed': True}
+        if kind == 'tasks':
+            goals = dict(db.session.query(Goal.id, Goal.title).filter_by(user_id=user_id).all())
+            goals_by_title = {title: goal_id for goal_id, title in goals.items()}
+            model, parse = Task, lambda r: TransferService._parse_task(r, goals, goals_by_title)
+        else:
+            model, parse = Goal, TransferService._parse_goal
+
+        def flush(chunk, line_no):
+            try:
+                summary['imported'] += TransferService._insert_chunk(model, chunk, user_id)
+                return True
+            except Exception as e:
+                summary['completed'] = False
+                summary['skipped'] += len(chunk)
+                summary['errors'].append(
+                    {'line': line_no, 'error': f"Import stopped, chunk ending here failed: {e}"})
+                return False
+
+        chunk = []
+        line_no = 0
+        for line_no, record in records:
+            try:
+                if record is None:
+                    raise ImportRowError("Malformed row")
+                row = parse(record)
+            except ImportRowError as e:
+                summary['skipped'] += 1
+                if len(summary['errors']) < MAX_REPORTED_ERRORS:
+                    summary['errors'].append({'line': line_no, 'error': str(e)})
+                continue
+            row['user_id'] = user_id
+            chunk.append(row)
+            if len(chunk) >= IMPORT_CHUNK_SIZE:
+                if not flush(chunk, line_no):
+                    return summary
+                chunk = []
+        if chunk:
+            flush(chunk, line_no)
+        return summary
+
+    @staticmethod
+    @retry_on_lock
+    def _insert_chunk(model, rows, user_id):
+        try:
+            if model is Task:
+                TransferService._count_imported_tasks(rows, user_id)
+            db.session.execute(db.insert(model), rows)
+            UserService.bump_data_version(user_id)
+            events.emit(user_id, 'tasks.imported' if model is Task else 'goals.imported', count=len(rows))
+            db.session.commit()
+            return len(rows)
+        except Exception:
+            db.session.rollback()
+            raise
+
+    @staticmethod
+    def _count_imported_tasks(rows, user_id):
+        """Goal counters and daily stats for a chunk of task rows about to be inserted"""
+        # Imported tasks count as created now; their completion dates are unknown
+        now = StatsService.now()
+        tally = {}
+        for row in rows:
+            row['created_at'] = now
+            if row['goal_id'] is not None:
+                total, done = tally.get(row['goal_id'], (0, 0))
+                tally[row['goal_id']] = (total + 1, done + (1 if row['completed'] else 0))
+        for goal_id, (total, done) in tally.items():
+            GoalService.adjust_task_counts(goal_id, total=total, completed=done)
+        StatsService.apply(user_id, {now.date(): {'created': len(rows)}})
+
+    # ── Row validation ──
+
+    @staticmethod
+    def _text(record, key, required=False, max_len=None):
+        value = (record.get(key) or '')
+        value = value.strip() if isinstance(value, str) else str(value)
+        if required and not value:
+            raise ImportRowError(f"{key} is required")
+        if max_len and len(value) > max_len:
+            raise ImportRowError(f"{key} is longer than {max_len} characters")
+        return value
+
+    @staticmethod
+    def _date(record, key):
+        value = TransferService._text(record, key)
+        if not value:
+            return None
+        try:
+            return datetime.strptime(value, '%Y-%m-%d')
+        except ValueError:
+            raise ImportRowError(f"Invalid {key} '{value}', use YYYY-MM-DD")
+
+    @staticmethod
+    def _bool(record, key):
+        value = record.get(key)
+        if isinstance(value, bool):
+            return value
+        return str(value or '').strip().lower() in _TRUE_VALUES
+
+    @staticmethod
+    def _parse_task(record, goals, goals_by_title):
+        priority = TransferService._text(record, 'priority') or 'Medium'
+        if priority not in PRIORITIES:
+            raise ImportRowError(f"Invalid priority '{priority}'")
+
+        # Goals are matched by title first so exports re-import into another account
+        goal_id = None
+        goal_title = TransferService._text(record, 'goal_title')
+        raw_goal_id = TransferService._text(record, 'goal_id')
+        if goal_title:
+            goal_id = goals_by_title.get(goal_title)
+            if goal_id is None:
+                raise ImportRowError(f"Unknown goal '{goal_title}'")
+        elif raw_goal_id:
+            try:
+                goal_id = int(raw_goal_id)
+            except ValueError:
+                raise ImportRowError(f"Invalid goal_id '{raw_goal_id}'")
+            if goal_id not in goals:
+                raise ImportRowError(f"Unknown goal_id {goal_id}")
+
+        return {
+            'title':       TransferService._text(record, 'title', required=True, max_len=150),
+            'description': TransferService._text(record, 'description'),
+            'due_date':    TransferService._date(record, 'due_date'),
+            'priority':    priority,
+            'completed':   TransferService._bool(record, 'completed'),
+            'goal_id':     goal_id,
+        }
+
+    @staticmethod
+    def _parse_goal(record):
+        return {
+            'title':       TransferService._text(record, 'title', required=True, max_len=150),
+            'description': TransferService._text(record, 'description'),
+            'target_date': TransferService._date(record, 'target_date'),
+            'completed':   TransferService._bool(record, 'completed'),
+        }
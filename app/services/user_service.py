@@ -1,12 +1,22 @@
 """User service for user-related operations"""
-from werkzeug.security import generate_password_hash, check_password_hash
+import logging
+from concurrent.futures import TimeoutError as HashTimeoutError
 from app.models import db, User
+from app.models.user import SessionUser
+from app.utils.cache import user_cache
 from app.utils.validators import validate_email, validate_password
+from app.utils.decorators import retry_on_lock, raise_if_retryable
+from app.utils.passwords import password_hasher, HashingBusyError
+
+logger = logging.getLogger(__name__)
+
+BUSY_MESSAGE = "Server is busy, please try again in a moment"
 
 class UserService:
     """Service class for user operations"""
 
     @staticmethod
+    @retry_on_lock
     def register_user(full_name, email, password, confirm_password):
         if not full_name or not email or not password:
             return False, "All fields are required"
@@ -19,14 +29,19 @@ class UserService:
             return False, msg
         if User.query.filter_by(email=email).first():
             return False, "Email already registered"
+        try:
+            password_hash = password_hasher.hash(password)
+        except (HashingBusyError, HashTimeoutError):
+            return False, BUSY_MESSAGE
         try:
             new_user = User(full_name=full_name, email=email,
-                            password=generate_password_hash(password))
+                            password=password_hash)
             db.session.add(new_user)
             db.session.commit()
             return True, "Registration successful"
         except Exception as e:
             db.session.rollback()
+            raise_if_retryable(e)
             return False, f"Registration failed: {str(e)}"
 
     @staticmethod
@@ -34,15 +49,64 @@ class UserService:
         if not email or not password:
             return None, "Email and password are required"
         user = User.query.filter_by(email=email).first()
-        if user and check_password_hash(user.password, password):
+        try:
+            valid = user is not None and password_hasher.verify(user.password, password)
+        except (HashingBusyError, HashTimeoutError):
+            return None, BUSY_MESSAGE
+        if valid:
+            if password_hasher.needs_rehash(user.password):
+                UserService._rehash_password(user, password)
             return user, "Login successful"
         return None, "Invalid email or password"
 
+    @staticmethod
+    def _rehash_password(user, password):
+        """Upgrade a stored hash to the configured parameters; failure is non-fatal"""
+        try:
+            user.password = password_hasher.hash(password)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Password rehash failed for user {user.id}: {e}")
+
     @staticmethod
     def get_user_by_id(user_id):
         return User.query.get(user_id)
 
     @staticmethod
+    def load_session_user(user_id):
+        """Identity for current_user, cached so most requests skip the user SELECT"""
+        key = f"user:{user_id}"
+        data = user_cache.get(key)
+        if data is None:
+            user = User.query.get(user_id)
+            if not user:
+                return None
+            data = SessionUser.from_user(user).to_dict()
+            user_cache.set(key, data)
+        return SessionUser(**data)
+
+    @staticmethod
+    def invalidate_session_user(user_id):
+        user_cache.delete(f"user:{user_id}")
+
+    @staticmethod
+    def get_data_version(user_id):
+        """Current version of the user's task/goal data (for cache keys)"""
+        return db.session.query(User.data_version).filter_by(id=user_id).scalar() or 0
+
+    @staticmethod
+    def bump_data_version(user_id):
+        """Invalidate the user's cached data; call before committing a write"""
+        db.session.execute(
+            db.update(User)
+            .where(User.id == user_id)
+            .values(data_version=db.func.coalesce(User.data_version, 0) + 1)
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    @retry_on_lock
     def update_profile(user_id, full_name):
         """Update user's display name"""
         if not full_name or not full_name.strip():
@@ -53,28 +117,36 @@ class UserService:
         try:
             user.full_name = full_name.strip()
             db.session.commit()
+            UserService.invalidate_session_user(user_id)
             return True, "Profile updated successfully"
         except Exception as e:
             db.session.rollback()
+            raise_if_retryable(e)
             return False, f"Error updating profile: {str(e)}"
 
     @staticmethod
+    @retry_on_lock
     def change_password(user_id, current_password, new_password, confirm_password):
         """Change user's password"""
         user = User.query.get(user_id)
         if not user:
             return False, "User not found"
-        if not check_password_hash(user.password, current_password):
-            return False, "Current password is incorrect"
+        try:
+            if not password_hasher.verify(user.password, current_password):
+                return False, "Current password is incorrect"
+        except (HashingBusyError, HashTimeoutError):
+            return False, BUSY_MESSAGE
         if new_password != confirm_password:
             return False, "New passwords do not match"
         is_valid, msg = validate_password(new_password)
         if not is_valid:
             return False, msg
         try:
-            user.password = generate_password_hash(new_password)
+            user.password = password_hasher.hash(new_password)
             db.session.commit()
+            UserService.invalidate_session_user(user_id)
             return True, "Password changed successfully"
         except Exception as e:
             db.session.rollback()
+            raise_if_retryable(e)
             return False, f"Error changing password: {str(e)}"
@@ -1,7 +1,9 @@
 """Initialize utils package"""
 from app.utils.decorators import login_required_custom, owner_required
-from app.utils.validators import validate_email, validate_password, validate_date_format, calculate_goal_progress
+from app.utils.validators import validate_email, validate_password, validate_date_format, calculate_goal_progress, progress_from_counts
 from app.utils.helpers import format_datetime
+from app.utils.cache import cache, user_cache, fragment_cache
+from app.utils.pagination import encode_task_cursor, decode_task_cursor, encode_search_cursor, decode_search_cursor
 
 __all__ = [
     'login_required_custom',
@@ -10,5 +12,13 @@ __all__ = [
     'validate_password',
     'validate_date_format',
     'calculate_goal_progress',
-    'format_datetime'
+    'progress_from_counts',
+    'format_datetime',
+    'cache',
+    'user_cache',
+    'fragment_cache',
+    'encode_task_cursor',
+    'decode_task_cursor',
+    'encode_search_cursor',
+    'decode_search_cursor'
 ]
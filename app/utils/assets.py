@@ -0,0 +1,140 @@
+"""Fingerprinted, precompressed static assets
+
+`flask --app run.py assets build` copies every file under app/static to
+app/static/dist/ with a content hash in its name (css/style.css ->
+dist/css/style.1a2b3c4d5e6f.css), writes .gz and .br (brotli is optional)
+siblings next to each copy, and records the mapping in
+dist/manifest.json.
+
+When the manifest exists, url_for('static', filename='css/style.css')
+points at the hashed copy, which is served with a year-long immutable
+Cache-Control and, if the client accepts it, the brotli or gzip variant
+(Content-Encoding + Vary: Accept-Encoding). Without a manifest (e.g. in
+development) static files behave exactly as before.
+"""
+import os
+import json
+import gzip
+import hashlib
+import logging
+import mimetypes
+from flask import request, current_app, send_from_directory
+from flask.sessions import SecureCookieSessionInterface
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip variants are built without it
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+# Text-like assets worth compressing; images and fonts are already compressed
+COMPRESSIBLE = {'.css', '.js', '.svg', '.json', '.txt', '.html', '.map', '.xml'}
+# Encodings in order of preference, with the file suffix of their variant
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def build_assets(static_folder, hash_length=12):
+    """
+    Fingerprint and precompress everything under static_folder into
+    static_folder/dist and write the manifest. Returns the manifest dict.
+    """
+    dist = os.path.join(static_folder, DIST_DIR)
+    manifest = {}
+    for root, dirs, files in os.walk(static_folder):
+        # Never fingerprint our own output
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != dist]
+        for name in sorted(files):
+            source = os.path.join(root, name)
+            rel = os.path.relpath(source, static_folder).replace(os.sep, '/')
+            with open(source, 'rb') as f:
+                data = f.read()
+            digest = hashlib.sha256(data).hexdigest()[:hash_length]
+            stem, ext = os.path.splitext(rel)
+            hashed = f"{stem}.{digest}{ext}"
+            target = os.path.join(dist, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as f:
+                f.write(data)
+            if ext.lower() in COMPRESSIBLE:
+                with open(target + '.gz', 'wb') as f:
+                    f.write(gzip.compress(data, compresslevel=9, mtime=0))
+                if brotli is not None:
+                    with open(target + '.br', 'wb') as f:
+                        f.write(brotli.compress(data, quality=11))
+            manifest[rel] = f"{DIST_DIR}/{hashed}"
+    with open(os.path.join(dist, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+class StaticSessionInterface(SecureCookieSessionInterface):
+    """
+    Cookie sessions that are never saved on static responses. Flask-Login's
+    after_request touches the session on every request, which would add
+    Vary: Cookie and stop shared caches from storing static files.
+    """
+
+    def save_session(self, app, session, response):
+        if request.endpoint == 'static':
+            return
+        super().save_session(app, session, response)
+
+
+class StaticAssets:
+    """Serves fingerprinted assets from the build manifest (Flask extension)"""
+
+    def __init__(self, app=None):
+        self.manifest = {}
+        self.max_age = 31536000
+        self._fingerprinted = set()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.max_age = app.config.get('STATIC_IMMUTABLE_MAX_AGE', 31536000)
+        self.static_folder = app.static_folder
+        self.manifest = {}
+        path = os.path.join(app.static_folder, DIST_DIR, MANIFEST_NAME)
+        if app.config.get('STATIC_FINGERPRINTING', True) and os.path.exists(path):
+            with open(path) as f:
+                self.manifest = json.load(f)
+            logger.info(f"Static assets: {len(self.manifest)} fingerprinted files")
+        self._fingerprinted = set(self.manifest.values())
+        app.extensions['static_assets'] = self
+        if type(app.session_interface) is SecureCookieSessionInterface:
+            app.session_interface = StaticSessionInterface()
+        app.url_defaults(self._rewrite_url)
+        app.view_functions['static'] = self.send_static_file
+
+    def _rewrite_url(self, endpoint, values):
+        if endpoint == 'static' and self.manifest:
+            hashed = self.manifest.get(values.get('filename'))
+            if hashed:
+                values['filename'] = hashed
+
+    def send_static_file(self, filename):
+        if filename not in self._fingerprinted:
+            # Plain static file: Flask's default handling and headers
+            return current_app.send_static_file(filename)
+
+        accepted = request.accept_encodings
+        for encoding, suffix in ENCODINGS:
+            variant = filename + suffix
+            if accepted[encoding] and os.path.exists(os.path.join(self.static_folder, variant)):
+                response = send_from_directory(self.static_folder, variant,
+                                               max_age=self.max_age, conditional=True)
+                response.headers['Content-Encoding'] = encoding
+                response.mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+                break
+        else:
+            response = send_from_directory(self.static_folder, filename,
+                                           max_age=self.max_age, conditional=True)
+        response.headers['Cache-Control'] = f'public, max-age={self.max_age}, immutable'
+        response.vary.add('Accept-Encoding')
+        return response
+
+
+static_assets = StaticAssets()
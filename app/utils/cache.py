@@ -0,0 +1,255 @@
+"""Pluggable key/value cache used for per-user analytics
+
+Backends:
+- memory: in-process LRU with TTL (default, one copy per gunicorn worker)
+- sqlite: shared file in the instance folder, visible to every worker
+- null:   caching disabled
+
+Keys should embed the user's data version (see UserService.get_data_version)
+so writes invalidate entries simply by bumping the version.
+
+Three instances are configured: `cache` (CACHE_* settings, analytics),
+`user_cache` (USER_CACHE_* settings, session identities) and
+`fragment_cache` (FRAGMENT_CACHE_* settings, rendered template fragments).
+"""
+import os
+import time
+import pickle
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class NullBackend:
+    """Backend that never stores anything"""
+    name = 'null'
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+    def __len__(self):
+        return 0
+
+
+class MemoryBackend:
+    """Thread-safe in-process LRU with per-entry expiry"""
+    name = 'memory'
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteBackend:
+    """Cache stored in a SQLite file so all worker processes share entries"""
+    name = 'sqlite'
+
+    def __init__(self, path, max_entries=1024):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entry ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL,"
+            " expires REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT value, expires FROM cache_entry WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[1] < now:
+            conn.execute("DELETE FROM cache_entry WHERE key = ?", (key,))
+            return None
+        conn.execute("UPDATE cache_entry SET accessed = ? WHERE key = ?", (now, key))
+        return pickle.loads(row[0])
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache_entry (key, value, expires, accessed) "
+            "VALUES (?, ?, ?, ?)",
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), now + ttl, now),
+        )
+        # Evict expired rows, then least recently used beyond the limit
+        conn.execute("DELETE FROM cache_entry WHERE expires < ?", (now,))
+        conn.execute(
+            "DELETE FROM cache_entry WHERE key IN ("
+            " SELECT key FROM cache_entry ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def delete(self, key):
+        self._conn().execute("DELETE FROM cache_entry WHERE key = ?", (key,))
+
+    def clear(self):
+        self._conn().execute("DELETE FROM cache_entry")
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM cache_entry").fetchone()[0]
+
+
+class Cache:
+    """
+    Cache front-end with hit/miss counters, configured from the Flask app.
+    Settings are read from <config_prefix>BACKEND, <config_prefix>MAX_ENTRIES, etc.
+    """
+
+    def __init__(self, app=None, config_prefix='CACHE_'):
+        self.config_prefix = config_prefix
+        self.name = config_prefix.rstrip('_').lower()
+        self.backend = MemoryBackend()
+        self.default_ttl = 300
+        self.stats_log_interval = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        def setting(name, default):
+            return app.config.get(self.config_prefix + name, default)
+
+        backend     = setting('BACKEND', 'memory')
+        max_entries = setting('MAX_ENTRIES', 1024)
+        self.default_ttl        = setting('DEFAULT_TTL', 300)
+        self.stats_log_interval = setting('STATS_LOG_INTERVAL', 0)
+
+        if backend == 'sqlite':
+            path = (setting('SQLITE_PATH', None)
+                    or os.path.join(app.instance_path, f'{self.name}.db'))
+            self.backend = SQLiteBackend(path, max_entries)
+        elif backend == 'null':
+            self.backend = NullBackend()
+        else:
+            self.backend = MemoryBackend(max_entries)
+        self.reset_stats()
+        app.extensions[self.name] = self
+
+    def get(self, key):
+        try:
+            value = self.backend.get(key)
+        except Exception as exc:
+            logger.warning(f"Cache get failed for {key}: {exc}")
+            value = None
+        self._record(value is not None)
+        return value
+
+    def set(self, key, value, ttl=None):
+        try:
+            self.backend.set(key, value, ttl or self.default_ttl)
+        except Exception as exc:
+            logger.warning(f"Cache set failed for {key}: {exc}")
+
+    def delete(self, key):
+        self.backend.delete(key)
+
+    def clear(self):
+        self.backend.clear()
+
+    def get_or_set(self, key, factory, ttl=None):
+        """Return the cached value for key, computing and storing it on a miss"""
+        value = self.get(key)
+        if value is None:
+            value = factory()
+            self.set(key, value, ttl)
+        return value
+
+    def _record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            lookups = self.hits + self.misses
+        if self.stats_log_interval and lookups % self.stats_log_interval == 0:
+            stats = self.stats()
+            logger.info(
+                f"Cache stats name={self.name} pid={os.getpid()} backend={stats['backend']} "
+                f"hits={stats['hits']} misses={stats['misses']} "
+                f"hit_rate={stats['hit_rate']:.1%}"
+            )
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Hit/miss counters for this worker process"""
+        lookups = self.hits + self.misses
+        return {
+            'name':     self.name,
+            'backend':  self.backend.name,
+            'pid':      os.getpid(),
+            'hits':     self.hits,
+            'misses':   self.misses,
+            'hit_rate': (self.hits / lookups) if lookups else 0.0,
+        }
+
+
+cache = Cache()
+# Identity of logged-in users, so current_user doesn't cost a SELECT per request
+user_cache = Cache(config_prefix='USER_CACHE_')
+# Rendered dashboard fragments (see app/utils/fragments.py)
+fragment_cache = Cache(config_prefix='FRAGMENT_CACHE_')
@@ -0,0 +1,212 @@
+"""Response compression for HTML, JSON and export responses
+
+Applied in an after_request hook. The encoding is the first entry of
+COMPRESS_ALGORITHMS (default br, zstd, gzip) that the client accepts and
+this worker can produce: gzip always, brotli with the `brotli` package,
+zstd with `zstandard`. Buffered responses smaller than COMPRESS_MIN_SIZE
+are sent as-is; streamed responses (exports) are compressed chunk by chunk
+as they are generated. Responses that already carry a Content-Encoding
+(precompressed static assets) or ask for no-transform are left alone.
+
+Strong ETags become weak, since the bytes differ per encoding; If-None-Match
+uses weak comparison so revalidation keeps working.
+
+Bytes in/out and compression CPU time are counted per worker and
+encoding (stats(), /metrics); with request instrumentation on, buffered
+responses also get a Server-Timing "compress" entry.
+"""
+import time
+import zlib
+import logging
+import threading
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+from flask import request
+from app.utils.instrumentation import instrumentation
+
+logger = logging.getLogger(__name__)
+
+
+class _BrotliStream:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.finish()
+
+
+def _gzip_stream(level):
+    return zlib.compressobj(level, zlib.DEFLATED, 31)
+
+
+def _zstd_stream(level):
+    return zstandard.ZstdCompressor(level=level).compressobj()
+
+
+class ResponseCompression:
+    """after_request compression of text responses (Flask extension)"""
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.encodings = []
+        self.min_size = 1024
+        self.mimetypes = set()
+        self.levels = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('COMPRESS_ENABLED', True)
+        self.min_size = app.config.get('COMPRESS_MIN_SIZE', 1024)
+        self.mimetypes = set(app.config.get('COMPRESS_MIMETYPES', ('text/html', 'application/json')))
+        self.levels = {
+            'gzip': app.config.get('COMPRESS_LEVEL', 6),
+            'br':   app.config.get('COMPRESS_BR_QUALITY', 4),
+            'zstd': app.config.get('COMPRESS_ZSTD_LEVEL', 3),
+        }
+        available = {'gzip': True, 'br': brotli is not None, 'zstd': zstandard is not None}
+        wanted = app.config.get('COMPRESS_ALGORITHMS', ('br', 'zstd', 'gzip'))
+        self.encodings = [name for name in wanted if available.get(name)]
+        self.reset_stats()
+        app.extensions['compression'] = self
+        if self.enabled and self.encodings:
+            app.after_request(self._after_request)
+            logger.info(f"Response compression: {', '.join(self.encodings)} "
+                        f"(min {self.min_size} bytes)")
+
+    # ── Codecs ──
+
+    def _stream(self, encoding):
+        level = self.levels[encoding]
+        if encoding == 'br':
+            return _BrotliStream(level)
+        if encoding == 'zstd':
+            return _zstd_stream(level)
+        return _gzip_stream(level)
+
+    def compress(self, data, encoding):
+        """Compress a complete body with the configured level"""
+        stream = self._stream(encoding)
+        return stream.compress(data) + stream.flush()
+
+    # ── Hook ──
+
+    def _choose_encoding(self):
+        accepted = request.accept_encodings
+        for encoding in self.encodings:
+            if accepted[encoding]:
+                return encoding
+        return None
+
+    def _should_compress(self, response):
+        if request.method == 'HEAD' or response.status_code < 200 or response.status_code in (204, 304):
+            return False
+        if 'Content-Encoding' in response.headers or response.mimetype not in self.mimetypes:
+            return False
+        return 'no-transform' not in (response.headers.get('Cache-Control') or '')
+
+    def _after_request(self, response):
+        if response.status_code == 304 and self._choose_encoding():
+            # Match the weak validator the full (compressed) response carried
+            self._weaken_etag(response)
+        if not self._should_compress(response):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = self._choose_encoding()
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = self._compress_stream(response.response, encoding)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            start = time.thread_time()
+            compressed = self.compress(data, encoding)
+            cpu = time.thread_time() - start
+            self._record(encoding, len(data), len(compressed), cpu)
+            response.set_data(compressed)
+            if instrumentation.enabled and instrumentation.server_timing:
+                response.headers.add(
+                    'Server-Timing',
+                    f'compress;dur={cpu * 1000:.1f};desc="{encoding} {len(data)}>{len(compressed)}"')
+
+        response.headers['Content-Encoding'] = encoding
+        self._weaken_etag(response)
+        return response
+
+    @staticmethod
+    def _weaken_etag(response):
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+
+    def _compress_stream(self, chunks, encoding):
+        stream = self._stream(encoding)
+        size_in = size_out = 0
+        cpu = 0.0
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode('utf-8')
+                start = time.thread_time()
+                out = stream.compress(chunk)
+                cpu += time.thread_time() - start
+                size_in += len(chunk)
+                size_out += len(out)
+                if out:
+                    yield out
+            start = time.thread_time()
+            out = stream.flush()
+            cpu += time.thread_time() - start
+            size_out += len(out)
+            yield out
+            self._record(encoding, size_in, size_out, cpu)
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close:
+                close()
+
+    # ── Stats ──
+
+    def _record(self, encoding, size_in, size_out, cpu_seconds):
+        with self._lock:
+            stats = self._stats.get(encoding)
+            if stats is None:
+                stats = self._stats[encoding] = {
+                    'responses': 0, 'bytes_in': 0, 'bytes_out': 0, 'cpu_seconds': 0.0}
+            stats['responses'] += 1
+            stats['bytes_in'] += size_in
+            stats['bytes_out'] += size_out
+            stats['cpu_seconds'] += cpu_seconds
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {}
+
+    def stats(self):
+        """Per-encoding totals for this worker, with ratio and bytes saved"""
+        with self._lock:
+            snapshot = {name: dict(s) for name, s in self._stats.items()}
+        for s in snapshot.values():
+            s['bytes_saved'] = s['bytes_in'] - s['bytes_out']
+            s['ratio'] = s['bytes_out'] / s['bytes_in'] if s['bytes_in'] else 1.0
+        return snapshot
+
+
+compression = ResponseCompression()
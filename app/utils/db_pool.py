@@ -0,0 +1,155 @@
+"""Connection pool profile and per-worker connection handling
+
+pool_options() turns the DB_POOL profile from config.py into engine
+options (pool size, overflow, checkout timeout, recycle age, pre-ping);
+in-memory SQLite keeps Flask-SQLAlchemy's StaticPool.
+
+configure_pool() makes pooled connections safe under a forking server.
+gunicorn --preload, or anything that connects before the fork, would
+otherwise leave workers checking out the parent's sockets. After a fork
+the child disposes every configured engine's pool without closing the
+parent's connections. As a second guard, each connection records the pid
+that opened it, and a checkout in another process discards it instead of
+using it. The pool's state and connect/checkout/invalidate counts are
+logged every DB_POOL_STATS_LOG_INTERVAL seconds, with a warning when the
+pool is exhausted and checkouts have to wait.
+"""
+import os
+import time
+import logging
+import threading
+import weakref
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+
+logger = logging.getLogger(__name__)
+
+# At most one "pool exhausted" warning per process per this many seconds
+EXHAUSTED_WARNING_INTERVAL = 60
+
+# Configured engines and their PoolStats
+_engines = weakref.WeakKeyDictionary()
+
+
+def pool_options(uri, profile):
+    """create_engine() options from a DB_POOL profile ({} for in-memory SQLite)"""
+    url = make_url(uri)
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        return {}
+    return {name: value for name, value in (profile or {}).items() if value is not None}
+
+
+def pool_stats(engine):
+    """The PoolStats of a configured engine (None if configure_pool() was not called)"""
+    return _engines.get(engine)
+
+
+def _dispose_after_fork():
+    for engine in list(_engines.keys()):
+        # close=False: the sockets belong to the parent; just forget them here
+        engine.dispose(close=False)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_dispose_after_fork)
+
+
+class PoolStats:
+    """Connect/checkout/invalidate counts for one engine's pool in this process"""
+
+    def __init__(self, engine, log_interval=0):
+        self.engine = engine
+        self.log_interval = log_interval
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.pid = os.getpid()
+            self.counts = {'connects': 0, 'checkouts': 0, 'invalidations': 0, 'foreign': 0}
+            self._last_log = time.monotonic()
+            self._last_warning = None
+
+    def count(self, name):
+        with self._lock:
+            if self.pid != os.getpid():
+                # Forked: start this worker's counts from zero
+                self.pid = os.getpid()
+                self.counts = dict.fromkeys(self.counts, 0)
+            self.counts[name] += 1
+            due = self.log_interval and time.monotonic() - self._last_log >= self.log_interval
+            if due:
+                self._last_log = time.monotonic()
+        if due:
+            self.log()
+
+    def snapshot(self):
+        """Pool state plus counters, for logs"""
+        pool = self.engine.pool
+        with self._lock:
+            stats = dict(self.counts)
+        stats['pool'] = type(pool).__name__
+        for name in ('size', 'checkedout', 'overflow'):
+            if hasattr(pool, name):
+                stats[name] = getattr(pool, name)()
+        return stats
+
+    def log(self):
+        s = self.snapshot()
+        logger.info(f"DB pool stats pid={os.getpid()} " + ' '.join(f"{k}={v}" for k, v in s.items()))
+
+    def check_exhausted(self):
+        pool = self.engine.pool
+        if not hasattr(pool, 'checkedout'):
+            return
+        limit = pool.size() + max(getattr(pool, '_max_overflow', 0), 0)
+        if pool.checkedout() < limit:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if self._last_warning is not None and now - self._last_warning < EXHAUSTED_WARNING_INTERVAL:
+                return
+            self._last_warning = now
+        logger.warning(f"DB pool exhausted pid={os.getpid()}: {pool.checkedout()} connections "
+                       f"checked out (size {pool.size()}); further checkouts wait up to "
+                       f"{getattr(pool, '_timeout', '?')}s")
+
+
+def configure_pool(engine, stats_log_interval=0):
+    """
+    Per-worker connection handling for an engine (once per engine): reset
+    after fork, refuse connections opened by another process, and count
+    and periodically log pool activity. Returns the engine's PoolStats.
+    """
+    if engine in _engines:
+        return _engines[engine]
+    stats = _engines[engine] = PoolStats(engine, stats_log_interval)
+
+    @event.listens_for(engine, 'connect')
+    def _connected(dbapi_conn, record):
+        record.info['pid'] = os.getpid()
+        stats.count('connects')
+
+    @event.listens_for(engine, 'checkout')
+    def _checked_out(dbapi_conn, record, proxy):
+        if record.info.get('pid', os.getpid()) != os.getpid():
+            # Opened before a fork: drop it without closing the parent's socket
+            stats.count('foreign')
+            record.dbapi_connection = proxy.dbapi_connection = None
+            raise exc.DisconnectionError(
+                f"Connection opened by pid {record.info['pid']} checked out in pid {os.getpid()}")
+        stats.count('checkouts')
+        stats.check_exhausted()
+
+    @event.listens_for(engine, 'invalidate')
+    def _invalidated(dbapi_conn, record, exception):
+        stats.count('invalidations')
+
+    pool = engine.pool
+    if hasattr(pool, 'size'):
+        logger.info(f"DB pool: {type(pool).__name__} size={pool.size()} "
+                    f"max_overflow={getattr(pool, '_max_overflow', '?')} "
+                    f"timeout={getattr(pool, '_timeout', '?')}s "
+                    f"recycle={getattr(pool, '_recycle', '?')}s "
+                    f"pre_ping={getattr(pool, '_pre_ping', '?')}")
+    return stats
@@ -1,6 +1,23 @@
+import time
+import random
+import logging
+import threading
 from functools import wraps
 from flask import redirect, url_for, flash, current_app
 from flask_login import current_user
+from sqlalchemy.exc import OperationalError
+from app.models import db
+
+logger = logging.getLogger(__name__)
+
+# Transient errors worth re-running a transaction for (SQLite and Postgres)
+_LOCK_ERROR_MARKERS = (
+    'database is locked',
+    'database table is locked',
+    'deadlock detected',
+    'could not serialize access',
+)
+_retry_state = threading.local()
 
 def login_required_custom(f):
     """Custom login required decorator with better error handling"""
@@ -23,3 +40,45 @@ def owner_required(model_attr='user_id'):
             return f(*args, **kwargs)
         return decorated_function
     return decorator
+
+def is_lock_error(exc):
+    """True if exc is a transient lock/busy error from the database"""
+    if not isinstance(exc, OperationalError):
+        return False
+    message = str(exc.orig if exc.orig is not None else exc).lower()
+    return any(marker in message for marker in _LOCK_ERROR_MARKERS)
+
+def raise_if_retryable(exc):
+    """
+    Call from a service's except block (after rollback): inside
+    @retry_on_lock with attempts left, re-raise lock errors so the
+    whole unit of work is retried instead of reported as a failure.
+    """
+    if getattr(_retry_state, 'attempts_left', 0) > 0 and is_lock_error(exc):
+        raise exc
+
+def retry_on_lock(f):
+    """Re-run a service write with exponential backoff on transient lock errors"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        retries = current_app.config.get('DB_LOCK_RETRIES', 0)
+        backoff = current_app.config.get('DB_LOCK_RETRY_BACKOFF', 0.05)
+        outer = getattr(_retry_state, 'attempts_left', None)
+        attempt = 0
+        try:
+            while True:
+                _retry_state.attempts_left = retries - attempt
+                try:
+                    return f(*args, **kwargs)
+                except OperationalError as exc:
+                    db.session.rollback()
+                    if not is_lock_error(exc) or attempt >= retries:
+                        raise
+                    delay = backoff * (2 ** attempt) * (0.5 + random.random())
+                    attempt += 1
+                    logger.warning(f"{f.__name__}: database locked, retry {attempt}/{retries} "
+                                   f"in {delay * 1000:.0f}ms")
+                    time.sleep(delay)
+        finally:
+            _retry_state.attempts_left = outer
+    return decorated_function
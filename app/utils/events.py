@@ -0,0 +1,346 @@
+"""Live change events for open dashboards (Server-Sent Events)
+
+Services call events.emit(user_id, type, **data) next to
+bump_data_version(); the event is held on the session and written to a
+shared SQLite log (instance/events.db unless EVENTS_DB_PATH) only once
+that session commits, and dropped if it rolls back.
+
+Fan-out across gunicorn workers needs no broker: each worker runs one
+poller thread that reads new log rows every EVENTS_POLL_INTERVAL seconds
+and hands them to the streams open in that worker, so the log is read
+once per worker, not once per connection. Rows older than
+EVENTS_RETENTION seconds are pruned.
+
+Each stream buffers at most EVENTS_BUFFER_SIZE events; a client that
+falls further behind gets a single `resync` event instead and reloads its
+data. Idle streams get a comment heartbeat every EVENTS_HEARTBEAT seconds
+(which also detects closed connections), and a stream ends after
+EVENTS_STREAM_MAX_SECONDS; the browser then reconnects with Last-Event-ID
+and the gap is replayed from the log.
+
+Every open stream holds one request thread of its worker for as long as
+it lasts (up to EVENTS_STREAM_MAX_SECONDS), so run gunicorn with threaded
+(gthread) workers. A worker serves at most EVENTS_MAX_STREAMS streams at
+once; keep that well below --threads so page loads and writes always
+find a free thread. Over the cap /events answers 204, which makes the
+browser stop reconnecting; the page then only patches itself after its
+own writes.
+"""
+import os
+import json
+import time
+import queue
+import sqlite3
+import logging
+import threading
+from flask import request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Rows read per poll / replay query
+READ_BATCH = 500
+# Seconds between prunes of old rows
+PRUNE_INTERVAL = 60
+# Queued in place of events once a stream's buffer overflows
+_RESYNC = object()
+
+
+def _format(event_id, data):
+    return f"id: {event_id}\ndata: {data}\n\n"
+
+
+class EventLog:
+    """SQLite file holding recent events of every user"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS events ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL,"
+            " data TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_events_user_id ON events (user_id, id)")
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def append(self, rows):
+        """Store rows of (user_id, data_json) in one transaction"""
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("INSERT INTO events (user_id, data, created) VALUES (?, ?, ?)",
+                             [(user_id, data, now) for user_id, data in rows])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def last_id(self):
+        return self._conn().execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+
+    def read_since(self, after_id, limit=READ_BATCH):
+        """(id, user_id, data) rows of every user after an id, oldest first"""
+        return self._conn().execute(
+            "SELECT id, user_id, data FROM events WHERE id > ? ORDER BY id LIMIT ?",
+            (after_id, limit)).fetchall()
+
+    def read_user_since(self, user_id, after_id, limit=READ_BATCH):
+        """(id, data) rows of one user after an id, oldest first"""
+        return self._conn().execute(
+            "SELECT id, data FROM events WHERE user_id = ? AND id > ? ORDER BY id LIMIT ?",
+            (user_id, after_id, limit)).fetchall()
+
+    def prune(self, before):
+        self._conn().execute("DELETE FROM events WHERE created < ?", (before,))
+
+    def clear(self):
+        self._conn().execute("DELETE FROM events")
+
+
+class _Subscription:
+    """One open stream's bounded buffer"""
+
+    def __init__(self, user_id, size):
+        self.user_id = user_id
+        self.buffer = queue.Queue(maxsize=size)
+
+    def put(self, item):
+        try:
+            self.buffer.put_nowait(item)
+        except queue.Full:
+            # Too far behind: replace the backlog with a single resync
+            while True:
+                try:
+                    self.buffer.get_nowait()
+                except queue.Empty:
+                    break
+            self.buffer.put_nowait(_RESYNC)
+
+
+class _Stream:
+    """SSE response body that frees its subscription when closed, even if never iterated"""
+
+    def __init__(self, body, release):
+        self.body = body
+        self.release = release
+
+    def __iter__(self):
+        return self.body
+
+    def close(self):
+        self.body.close()
+        self.release()
+
+
+class LiveEvents:
+    """Per-user change events over SSE, fanned out through a shared log (Flask extension)"""
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.log = None
+        self.poll_interval = 0.5
+        self.heartbeat = 15
+        self.buffer_size = 100
+        self.max_stream_seconds = 300
+        self.retention = 600
+        self.max_streams = 4
+        self._lock = threading.Lock()
+        self._subscribers = {}   # user_id -> set of _Subscription
+        self._pid = None
+        self._last_id = 0
+        self._hooked = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('EVENTS_ENABLED', True)
+        self.poll_interval = app.config.get('EVENTS_POLL_INTERVAL', 0.5)
+        self.heartbeat = app.config.get('EVENTS_HEARTBEAT', 15)
+        self.buffer_size = app.config.get('EVENTS_BUFFER_SIZE', 100)
+        self.max_stream_seconds = app.config.get('EVENTS_STREAM_MAX_SECONDS', 300)
+        self.retention = app.config.get('EVENTS_RETENTION', 600)
+        self.max_streams = app.config.get('EVENTS_MAX_STREAMS', 4)
+        app.extensions['events'] = self
+        if not self.enabled:
+            return
+        path = app.config.get('EVENTS_DB_PATH') or os.path.join(app.instance_path, 'events.db')
+        self.log = EventLog(path)
+        if not self._hooked:
+            event.listen(Session, 'after_commit', self._after_commit)
+            event.listen(Session, 'after_rollback', self._after_rollback)
+            self._hooked = True
+
+    # ── Publishing ──
+
+    def emit(self, user_id, type, **data):
+        """
+        Queue an event for the user's streams; it is published when the
+        current db session commits. The X-Client-Id request header (sent by
+        the dashboard) is recorded so a tab can skip its own changes.
+        """
+        if not self.enabled:
+            return
+        from app.models import db
+        payload = {'type': type, **data}
+        if has_request_context() and request.headers.get('X-Client-Id'):
+            payload['origin'] = request.headers['X-Client-Id'][:64]
+        db.session.info.setdefault('live_events', []).append((user_id, payload))
+
+    def _after_commit(self, session):
+        pending = session.info.pop('live_events', None)
+        if not pending or self.log is None:
+            return
+        try:
+            self.log.append([(user_id, json.dumps(payload, separators=(',', ':')))
+                             for user_id, payload in pending])
+        except Exception as exc:
+            # The write itself succeeded; open dashboards just miss the update
+            logger.warning(f"Publishing {len(pending)} live event(s) failed: {exc}")
+
+    def _after_rollback(self, session):
+        session.info.pop('live_events', None)
+
+    def last_id(self):
+        """Newest event id; read before rendering data so a stream can resume after it"""
+        if not self.enabled or self.log is None:
+            return 0
+        try:
+            return self.log.last_id()
+        except sqlite3.Error as exc:
+            logger.warning(f"Reading the live event log failed: {exc}")
+            return 0
+
+    # ── Fan-out within this worker ──
+
+    def _ensure_poller(self):
+        """Start this worker's poller thread (again after a fork); call with the lock held"""
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._subscribers = {}
+        self._last_id = self.log.last_id()
+        threading.Thread(target=self._poll, name='live-events-poller', daemon=True).start()
+
+    def _poll(self):
+        pid = os.getpid()
+        last_prune = 0.0
+        while self._pid == pid:
+            time.sleep(self.poll_interval)
+            try:
+                with self._lock:
+                    idle = not self._subscribers
+                    if idle:
+                        # Nobody listening here: skip ahead instead of reading
+                        self._last_id = self.log.last_id()
+                if not idle:
+                    self._dispatch()
+                if time.monotonic() - last_prune >= PRUNE_INTERVAL:
+                    last_prune = time.monotonic()
+                    self.log.prune(time.time() - self.retention)
+            except Exception as exc:
+                logger.warning(f"Live event poll failed: {exc}")
+
+    def _dispatch(self):
+        while True:
+            rows = self.log.read_since(self._last_id)
+            if not rows:
+                return
+            with self._lock:
+                for event_id, user_id, data in rows:
+                    for sub in self._subscribers.get(user_id, ()):
+                        sub.put((event_id, data))
+            self._last_id = rows[-1][0]
+            if len(rows) < READ_BATCH:
+                return
+
+    def _subscribe(self, user_id):
+        """A new subscription, or None if this worker has max_streams open"""
+        sub = _Subscription(user_id, self.buffer_size)
+        with self._lock:
+            self._ensure_poller()
+            if sum(len(subs) for subs in self._subscribers.values()) >= self.max_streams:
+                return None
+            self._subscribers.setdefault(user_id, set()).add(sub)
+        return sub
+
+    def _unsubscribe(self, sub):
+        with self._lock:
+            subs = self._subscribers.get(sub.user_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[sub.user_id]
+
+    # ── Streams ──
+
+    def stream(self, user_id, last_event_id=None):
+        """
+        SSE body for one user: events after last_event_id (replayed from the
+        log; None starts from now), then live ones as the poller delivers
+        them, with heartbeats, until EVENTS_STREAM_MAX_SECONDS have passed.
+        Returns None if this worker already has EVENTS_MAX_STREAMS open.
+        """
+        sub = self._subscribe(user_id)
+        if sub is None:
+            logger.warning(f"Live event streams at capacity ({self.max_streams}) in pid {os.getpid()}")
+            return None
+        return _Stream(self._stream(sub, last_event_id), lambda: self._unsubscribe(sub))
+
+    def _stream(self, sub, last_event_id):
+        user_id = sub.user_id
+        try:
+            last = self.log.last_id() if last_event_id is None else last_event_id
+            yield f"retry: {int(self.poll_interval * 1000) + 1000}\n\n"
+            backlog = self.log.read_user_since(user_id, last, self.buffer_size + 1)
+            if len(backlog) > self.buffer_size:
+                last = self.log.last_id()
+                yield _format(last, '{"type":"resync"}')
+            else:
+                for event_id, data in backlog:
+                    yield _format(event_id, data)
+                    last = event_id
+
+            deadline = time.monotonic() + self.max_stream_seconds
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    item = sub.buffer.get(timeout=min(self.heartbeat, remaining))
+                except queue.Empty:
+                    yield ": heartbeat\n\n"
+                    continue
+                if item is _RESYNC:
+                    last = self._last_id
+                    yield _format(last, '{"type":"resync"}')
+                    continue
+                event_id, data = item
+                # Already sent during the replay
+                if event_id <= last:
+                    continue
+                yield _format(event_id, data)
+                last = event_id
+        finally:
+            self._unsubscribe(sub)
+
+    def stats(self):
+        """Open streams in this worker"""
+        with self._lock:
+            return {'users': len(self._subscribers),
+                    'streams': sum(len(s) for s in self._subscribers.values())}
+
+
+events = LiveEvents()
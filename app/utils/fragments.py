@@ -0,0 +1,113 @@
+"""Jinja fragment caching
+
+    {% cache 'goals', current_user.id, data_version, today %}
+      ... expensive markup ...
+    {% endcache %}
+
+The rendered body is stored in `fragment_cache` (FRAGMENT_CACHE_* settings)
+under a key built from the fragment name and the listed values; include
+the user's data version so any task/goal write invalidates every fragment
+of that user. Template variables used only inside cached fragments can be
+passed as lazy() values, so a fully cached page never runs their queries.
+
+Per-fragment hits, misses and render time of misses are counted per
+worker (stats(), and /metrics); hits x average miss render time is the
+render time saved. When request instrumentation is on, each response's
+Server-Timing header also reports that request's fragment hits/misses.
+"""
+import time
+import threading
+from flask import g, has_request_context
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+from app.utils.cache import fragment_cache
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+class FragmentCacheExtension(Extension):
+    """Adds the {% cache name, key... %}...{% endcache %} tag"""
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            parts.append(parser.parse_expression())
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', [nodes.List(parts)]),
+                               [], [], body).set_lineno(lineno)
+
+    def _render(self, parts, caller):
+        name = str(parts[0])
+        key = 'fragment:' + ':'.join(str(p) for p in parts)
+        html = fragment_cache.get(key)
+        if html is not None:
+            _record(name, hit=True)
+            return Markup(html)
+        start = time.perf_counter()
+        html = caller()
+        _record(name, hit=False, seconds=time.perf_counter() - start)
+        fragment_cache.set(key, str(html))
+        return html
+
+
+def _record(name, hit, seconds=0.0):
+    with _stats_lock:
+        stats = _stats.get(name)
+        if stats is None:
+            stats = _stats[name] = {'hits': 0, 'misses': 0, 'render_seconds': 0.0}
+        stats['hits' if hit else 'misses'] += 1
+        stats['render_seconds'] += seconds
+    if has_request_context():
+        counts = g.setdefault('fragment_counts', {'hits': 0, 'misses': 0})
+        counts['hits' if hit else 'misses'] += 1
+
+
+def stats():
+    """Per-fragment counters for this worker, with the estimated render time saved"""
+    with _stats_lock:
+        snapshot = {name: dict(s) for name, s in _stats.items()}
+    for s in snapshot.values():
+        avg = s['render_seconds'] / s['misses'] if s['misses'] else 0.0
+        s['avg_render_ms'] = avg * 1000
+        s['saved_seconds'] = s['hits'] * avg
+    return snapshot
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+class lazy:
+    """Template value computed on first use (iteration, truth test, len, indexing)"""
+    __slots__ = ('_factory', '_value', '_loaded')
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._loaded = False
+        self._value = None
+
+    def _get(self):
+        if not self._loaded:
+            self._value = self._factory()
+            self._loaded = True
+        return self._value
+
+    def __iter__(self):
+        return iter(self._get())
+
+    def __len__(self):
+        return len(self._get())
+
+    def __bool__(self):
+        return bool(self._get())
+
+    def __getitem__(self, index):
+        return self._get()[index]
+
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
@@ -0,0 +1,173 @@
+"""Opt-in per-request instrumentation
+
+With INSTRUMENTATION_ENABLED, every request records:
+- query count and total SQL time (SQLAlchemy cursor-execute events)
+- template render time (Flask before_render_template/template_rendered)
+- total handler time
+- peak Python allocations (tracemalloc, only with INSTRUMENTATION_TRACEMALLOC)
+
+and reports them in a Server-Timing header, e.g.
+
+    Server-Timing: db;dur=3.1;desc="7 queries", render;dur=5.4, app;dur=12.9
+
+which browser dev tools show in the network timing tab. Requests slower than
+INSTRUMENTATION_BUDGET_MS, or issuing more than INSTRUMENTATION_QUERY_BUDGET
+queries, are logged as warnings. Per-endpoint totals are kept in memory for
+this worker process (see stats()).
+
+tracemalloc slows every allocation down and its peak is process-wide, so
+with threaded workers concurrent requests share one peak; use it while
+profiling, not in production.
+"""
+import time
+import logging
+import threading
+import tracemalloc
+from flask import g, request, has_request_context, before_render_template, template_rendered
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+
+class RequestInstrumentation:
+    """Per-request SQL/render/allocation timing (Flask extension)"""
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.budget_ms = 500
+        self.query_budget = 0
+        self.trace_malloc = False
+        self.server_timing = True
+        self._endpoints = {}
+        self._lock = threading.Lock()
+        self._engines = set()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled       = app.config.get('INSTRUMENTATION_ENABLED', False)
+        self.budget_ms     = app.config.get('INSTRUMENTATION_BUDGET_MS', 500)
+        self.query_budget  = app.config.get('INSTRUMENTATION_QUERY_BUDGET', 0)
+        self.trace_malloc  = app.config.get('INSTRUMENTATION_TRACEMALLOC', False)
+        self.server_timing = app.config.get('INSTRUMENTATION_SERVER_TIMING', True)
+        self.reset_stats()
+        app.extensions['instrumentation'] = self
+        if not self.enabled:
+            return
+
+        from app.models import db
+        with app.app_context():
+            self._listen(db.engine)
+        before_render_template.connect(self._render_started, app)
+        template_rendered.connect(self._render_finished, app)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        if self.trace_malloc and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        logger.info(f"Request instrumentation on (budget {self.budget_ms}ms, "
+                    f"tracemalloc {'on' if self.trace_malloc else 'off'})")
+
+    # ── Collection ──
+
+    def _listen(self, engine):
+        if engine in self._engines:
+            return
+        self._engines.add(engine)
+
+        @event.listens_for(engine, 'before_cursor_execute')
+        def _query_started(conn, cursor, statement, parameters, context, executemany):
+            if has_request_context() and 'instr' in g:
+                conn.info.setdefault('instr_start', []).append(time.perf_counter())
+
+        @event.listens_for(engine, 'after_cursor_execute')
+        def _query_finished(conn, cursor, statement, parameters, context, executemany):
+            starts = conn.info.get('instr_start')
+            if starts and has_request_context() and 'instr' in g:
+                g.instr['queries'] += 1
+                g.instr['sql'] += time.perf_counter() - starts.pop()
+
+    def _render_started(self, sender, template, context, **extra):
+        if 'instr' in g:
+            g.instr['render_start'] = time.perf_counter()
+
+    def _render_finished(self, sender, template, context, **extra):
+        if 'instr' in g and g.instr['render_start'] is not None:
+            g.instr['render'] += time.perf_counter() - g.instr['render_start']
+            g.instr['render_start'] = None
+
+    def _before_request(self):
+        if self.trace_malloc:
+            tracemalloc.reset_peak()
+        g.instr = {'start': time.perf_counter(), 'queries': 0, 'sql': 0.0,
+                   'render': 0.0, 'render_start': None}
+
+    def _after_request(self, response):
+        instr = g.pop('instr', None)
+        if instr is None:
+            return response
+        total_ms  = (time.perf_counter() - instr['start']) * 1000
+        sql_ms    = instr['sql'] * 1000
+        render_ms = instr['render'] * 1000
+        peak_kb   = tracemalloc.get_traced_memory()[1] / 1024 if self.trace_malloc else None
+        endpoint  = request.endpoint or 'unmatched'
+        self._record(endpoint, total_ms, instr['queries'], sql_ms, render_ms, peak_kb)
+
+        if self.server_timing:
+            metrics = [f'db;dur={sql_ms:.1f};desc="{instr["queries"]} queries"',
+                       f'render;dur={render_ms:.1f}', f'app;dur={total_ms:.1f}']
+            if peak_kb is not None:
+                metrics.append(f'mem;desc="peak {peak_kb:.0f}KiB"')
+            fragments = g.get('fragment_counts')
+            if fragments:
+                metrics.append(f'frag;desc="{fragments["hits"]} hit, {fragments["misses"]} miss"')
+            response.headers.add('Server-Timing', ', '.join(metrics))
+
+        over_time = self.budget_ms and total_ms > self.budget_ms
+        over_queries = self.query_budget and instr['queries'] > self.query_budget
+        if over_time or over_queries:
+            logger.warning(
+                f"Slow request {request.method} {request.path} endpoint={endpoint} "
+                f"status={response.status_code} total={total_ms:.1f}ms "
+                f"queries={instr['queries']} sql={sql_ms:.1f}ms render={render_ms:.1f}ms"
+                + (f" peak={peak_kb:.0f}KiB" if peak_kb is not None else "")
+            )
+        return response
+
+    def _record(self, endpoint, total_ms, queries, sql_ms, render_ms, peak_kb):
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = {
+                    'requests': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'queries': 0,
+                    'max_queries': 0, 'sql_ms': 0.0, 'render_ms': 0.0, 'peak_kb': 0.0,
+                }
+            stats['requests']   += 1
+            stats['total_ms']   += total_ms
+            stats['max_ms']      = max(stats['max_ms'], total_ms)
+            stats['queries']    += queries
+            stats['max_queries'] = max(stats['max_queries'], queries)
+            stats['sql_ms']     += sql_ms
+            stats['render_ms']  += render_ms
+            if peak_kb is not None:
+                stats['peak_kb'] = max(stats['peak_kb'], peak_kb)
+
+    # ── Reporting ──
+
+    def reset_stats(self):
+        with self._lock:
+            self._endpoints = {}
+
+    def stats(self):
+        """Per-endpoint totals and averages for this worker process"""
+        with self._lock:
+            snapshot = {name: dict(s) for name, s in self._endpoints.items()}
+        for s in snapshot.values():
+            n = s['requests']
+            s['avg_ms'] = s['total_ms'] / n
+            s['avg_queries'] = s['queries'] / n
+            s['avg_sql_ms'] = s['sql_ms'] / n
+            s['avg_render_ms'] = s['render_ms'] / n
+        return snapshot
+
+
+instrumentation = RequestInstrumentation()
@@ -0,0 +1,435 @@
+"""Prometheus metrics aggregated across gunicorn workers
+
+Each worker process accumulates counters and histograms in memory and,
+at most every METRICS_FLUSH_INTERVAL seconds (and whenever /metrics is
+served), adds what it counted since its last flush to one shared
+cumulative row per series in a SQLite file. Any worker can therefore
+answer a scrape with numbers for the whole deployment, counters stay
+monotonic across worker restarts, and the store grows with the number of
+series, not with the number of workers gunicorn has ever started. Gauges
+(pool usage) are per-pid and dropped when a worker exits or stops reporting.
+
+Recorded:
+- performx_http_requests_total{blueprint,method,status}
+- performx_http_request_duration_seconds{blueprint}      (histogram)
+- performx_db_queries_total{blueprint}
+- performx_db_query_duration_seconds                      (histogram)
+- performx_password_hash_duration_seconds                 (histogram)
+- performx_cache_lookups_total{cache,result}
+- performx_fragment_cache_lookups_total{fragment,result}
+- performx_fragment_render_seconds_total{fragment}      (misses only)
+- performx_compression_bytes_total{encoding,direction}
+- performx_compression_seconds_total{encoding}           (CPU time)
+- performx_db_pool_{size,checked_out,overflow}{pid}       (gauges)
+"""
+import os
+import json
+import time
+import functools
+import atexit
+import sqlite3
+import logging
+import threading
+from flask import g, request, has_request_context
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+HASH_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+METRIC_HELP = {
+    'performx_http_requests_total':           ('counter', "HTTP requests by blueprint, method and status"),
+    'performx_http_request_duration_seconds': ('histogram', "Request latency by blueprint"),
+    'performx_db_queries_total':              ('counter', "SQL statements executed, by blueprint"),
+    'performx_db_query_duration_seconds':     ('histogram', "SQL statement latency"),
+    'performx_password_hash_duration_seconds': ('histogram', "Password hash/verify time"),
+    'performx_cache_lookups_total':           ('counter', "Cache lookups by cache and result"),
+    'performx_fragment_cache_lookups_total':  ('counter', "Template fragment cache lookups"),
+    'performx_fragment_render_seconds_total': ('counter', "Time spent rendering uncached fragments"),
+    'performx_compression_bytes_total':       ('counter', "Response bytes before (in) and after (out) compression"),
+    'performx_compression_seconds_total':     ('counter', "CPU time spent compressing responses"),
+    'performx_db_pool_size':                  ('gauge', "Connection pool size per worker"),
+    'performx_db_pool_checked_out':           ('gauge', "Connections in use per worker"),
+    'performx_db_pool_overflow':              ('gauge', "Overflow connections per worker"),
+}
+
+
+@functools.lru_cache(maxsize=4096)
+def _items_key(items):
+    return json.dumps(sorted(items))
+
+
+def _label_key(labels):
+    """Serialised labels (cached: this runs for every observation)"""
+    return _items_key(tuple(labels.items()))
+
+
+_QUERY_DURATION = ('performx_db_query_duration_seconds', _label_key({}))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def _format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class MetricsStore:
+    """
+    SQLite file holding the deployment's series: counters and histograms
+    as one cumulative row each (worker ''), gauges per worker
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS metric_series ("
+            " worker TEXT NOT NULL, name TEXT NOT NULL, labels TEXT NOT NULL,"
+            " kind TEXT NOT NULL, value REAL NOT NULL, updated REAL NOT NULL,"
+            " PRIMARY KEY (worker, name, labels))"
+        )
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def write(self, worker, rows, gauge_max_age):
+        """
+        Add rows of (name, labels_json, kind, value) to the cumulative series;
+        gauge rows replace this worker's values instead. Gauges of workers
+        silent for gauge_max_age seconds are dropped.
+        """
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO metric_series (worker, name, labels, kind, value, updated) "
+                "VALUES ('', ?, ?, ?, ?, ?) ON CONFLICT (worker, name, labels) "
+                "DO UPDATE SET value = value + excluded.value, updated = excluded.updated",
+                [(name, labels, kind, value, now)
+                 for name, labels, kind, value in rows if kind != 'gauge' and value],
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO metric_series (worker, name, labels, kind, value, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(worker, name, labels, kind, value, now)
+                 for name, labels, kind, value in rows if kind == 'gauge'],
+            )
+            conn.execute("DELETE FROM metric_series WHERE kind = 'gauge' AND updated < ?",
+                         (now - gauge_max_age,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def read(self, gauge_max_age):
+        """Cumulative counters and histograms; gauges from recently reporting workers"""
+        conn = self._conn()
+        summed = conn.execute(
+            "SELECT name, labels, SUM(value) FROM metric_series "
+            "WHERE kind != 'gauge' GROUP BY name, labels"
+        ).fetchall()
+        gauges = conn.execute(
+            "SELECT name, labels, worker, value FROM metric_series "
+            "WHERE kind = 'gauge' AND updated >= ?", (time.time() - gauge_max_age,)
+        ).fetchall()
+        return summed, gauges
+
+    def retire(self, worker):
+        """Drop an exiting worker's gauges (its counts are already in the totals)"""
+        self._conn().execute(
+            "DELETE FROM metric_series WHERE worker = ? AND kind = 'gauge'", (worker,))
+
+    def clear(self):
+        self._conn().execute("DELETE FROM metric_series")
+
+
+class Metrics:
+    """Request/DB/hash metrics collector and Prometheus renderer (Flask extension)"""
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.store = None
+        self.flush_interval = 5
+        self._lock = threading.Lock()
+        self._engines = set()
+        self._hooked = False
+        self._baseline = {}     # last flushed values of _totals()
+        self._reset_local()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('METRICS_ENABLED', True)
+        self.flush_interval = app.config.get('METRICS_FLUSH_INTERVAL', 5)
+        app.extensions['metrics'] = self
+        if not self.enabled:
+            return
+        if app.config.get('METRICS_REQUIRE_TOKEN') and not app.config.get('METRICS_TOKEN'):
+            logger.warning("METRICS_TOKEN is not set; /metrics will answer 404 until it is")
+        path = (app.config.get('METRICS_DB_PATH')
+                or os.path.join(app.instance_path, 'metrics.db'))
+        self.store = MetricsStore(path)
+        self._app = app
+
+        from app.models import db
+        from app.utils.passwords import password_hasher
+        with app.app_context():
+            self._listen(db.engine)
+            self._engine = db.engine
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        if not self._hooked:
+            password_hasher.observers.append(
+                lambda seconds: self.observe('performx_password_hash_duration_seconds', {},
+                                             seconds, HASH_BUCKETS))
+            atexit.register(self.shutdown)
+            self._hooked = True
+
+    # ── Recording ──
+
+    def _reset_local(self):
+        self._pid = os.getpid()
+        self._worker = f"{self._pid}:{time.time():.0f}"
+        self._counters = {}     # (name, label_key) -> count since the last flush
+        self._histograms = {}   # (name, label_key) -> [bucket counts..., sum, count] since the last flush
+        self._buckets = {}      # name -> bucket bounds
+        self._last_flush = time.monotonic()
+        self._flush_lock = threading.Lock()
+
+    def _check_fork(self):
+        # A forked worker must not report the parent's counts as its own
+        if self._pid != os.getpid():
+            self._reset_local()
+
+    def inc(self, name, labels, amount=1):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._check_fork()
+            self._inc(key, amount)
+
+    def observe(self, name, labels, value, buckets):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._check_fork()
+            self._observe(key, value, buckets)
+
+    def _inc(self, key, amount):
+        self._counters[key] = self._counters.get(key, 0) + amount
+
+    def _observe(self, key, value, buckets):
+        self._buckets[key[0]] = buckets
+        series = self._histograms.get(key)
+        if series is None:
+            series = self._histograms[key] = [0] * (len(buckets) + 2)
+        for i, bound in enumerate(buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def _listen(self, engine):
+        if engine in self._engines:
+            return
+        self._engines.add(engine)
+
+        @event.listens_for(engine, 'before_cursor_execute')
+        def _query_started(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault('metrics_start', []).append(time.perf_counter())
+
+        @event.listens_for(engine, 'after_cursor_execute')
+        def _query_finished(conn, cursor, statement, parameters, context, executemany):
+            starts = conn.info.get('metrics_start')
+            if not starts:
+                return
+            elapsed = time.perf_counter() - starts.pop()
+            blueprint = _blueprint() if has_request_context() else 'none'
+            key = ('performx_db_queries_total', _label_key({'blueprint': blueprint}))
+            with self._lock:
+                self._check_fork()
+                self._inc(key, 1)
+                self._observe(_QUERY_DURATION, elapsed, QUERY_BUCKETS)
+
+    def _before_request(self):
+        g.metrics_start = time.perf_counter()
+
+    def _after_request(self, response):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return response
+        blueprint = _blueprint()
+        duration = ('performx_http_request_duration_seconds', _label_key({'blueprint': blueprint}))
+        requests = ('performx_http_requests_total',
+                    _label_key({'blueprint': blueprint, 'method': request.method,
+                                'status': str(response.status_code)}))
+        with self._lock:
+            self._check_fork()
+            self._observe(duration, time.perf_counter() - start, REQUEST_BUCKETS)
+            self._inc(requests, 1)
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+        return response
+
+    # ── Shared store ──
+
+    def _totals(self):
+        """Cumulative counters kept by other modules (caches, fragments, compression)"""
+        from app.utils.cache import cache, user_cache, fragment_cache
+        from app.utils import fragments
+        from app.utils.compression import compression
+        totals = {}
+        for c in (cache, user_cache, fragment_cache):
+            for result, value in (('hit', c.hits), ('miss', c.misses)):
+                totals[('performx_cache_lookups_total',
+                        _label_key({'cache': c.name, 'result': result}))] = value
+        for name, s in fragments.stats().items():
+            for result, field in (('hit', 'hits'), ('miss', 'misses')):
+                totals[('performx_fragment_cache_lookups_total',
+                        _label_key({'fragment': name, 'result': result}))] = s[field]
+            totals[('performx_fragment_render_seconds_total',
+                    _label_key({'fragment': name}))] = s['render_seconds']
+        for encoding, s in compression.stats().items():
+            for direction in ('in', 'out'):
+                totals[('performx_compression_bytes_total',
+                        _label_key({'encoding': encoding, 'direction': direction}))] = s['bytes_' + direction]
+            totals[('performx_compression_seconds_total',
+                    _label_key({'encoding': encoding}))] = s['cpu_seconds']
+        return totals
+
+    def _take(self):
+        """
+        What this worker counted since its last flush, as store rows, plus
+        the state to put back if writing them fails
+        """
+        with self._lock:
+            self._check_fork()
+            counters, self._counters = self._counters, {}
+            histograms, self._histograms = self._histograms, {}
+            buckets = dict(self._buckets)
+        baseline, totals = self._baseline, self._totals()
+        self._baseline = totals
+
+        rows = [(name, labels, 'counter', value) for (name, labels), value in counters.items()]
+        for (name, labels), value in totals.items():
+            previous = baseline.get((name, labels), 0)
+            # A total below the last one was reset; count it from zero
+            rows.append((name, labels, 'counter', value - previous if value >= previous else value))
+        for (name, labels), series in histograms.items():
+            base = json.loads(labels)
+            for bound, count in zip(buckets[name] + ('+Inf',), series[:-2] + [series[-1]]):
+                le = bound if bound == '+Inf' else repr(float(bound))
+                rows.append((f'{name}_bucket', json.dumps(base + [['le', le]]), 'histogram', count))
+            rows.append((f'{name}_sum', labels, 'histogram', series[-2]))
+            rows.append((f'{name}_count', labels, 'histogram', series[-1]))
+
+        pool = getattr(self, '_engine', None) and self._engine.pool
+        for name, attr in (('performx_db_pool_size', 'size'),
+                           ('performx_db_pool_checked_out', 'checkedout'),
+                           ('performx_db_pool_overflow', 'overflow')):
+            if hasattr(pool, attr):
+                # QueuePool.overflow() counts up from -pool_size
+                rows.append((name, '[]', 'gauge', max(getattr(pool, attr)(), 0)))
+        return rows, (counters, histograms, baseline)
+
+    def _restore(self, counters, histograms, baseline):
+        """Put counts whose flush failed back, to be written next time"""
+        with self._lock:
+            for key, value in counters.items():
+                self._inc(key, value)
+            for key, series in histograms.items():
+                current = self._histograms.setdefault(key, [0] * len(series))
+                self._histograms[key] = [a + b for a, b in zip(current, series)]
+        self._baseline = baseline
+
+    def _gauge_max_age(self):
+        return max(self.flush_interval * 12, 60)
+
+    def flush(self):
+        if not self.enabled or self.store is None:
+            return
+        with self._lock:
+            self._check_fork()
+        # Deltas must be taken and written by one thread at a time
+        if not self._flush_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_flush = time.monotonic()
+            rows, taken = self._take()
+            try:
+                self.store.write(self._worker, rows, self._gauge_max_age())
+            except Exception as exc:
+                self._restore(*taken)
+                logger.warning(f"Metrics flush failed: {exc}")
+        except Exception as exc:
+            logger.warning(f"Metrics flush failed: {exc}")
+        finally:
+            self._flush_lock.release()
+
+    def shutdown(self):
+        """Final flush when the worker exits"""
+        self.flush()
+        if self.enabled and self.store is not None:
+            try:
+                self.store.retire(self._worker)
+            except Exception as exc:
+                logger.warning(f"Metrics shutdown failed: {exc}")
+
+    def render(self):
+        """Prometheus text exposition (format 0.0.4) for all workers"""
+        self.flush()
+        summed, gauges = self.store.read(gauge_max_age=self._gauge_max_age())
+        series = [(name, json.loads(labels), value) for name, labels, value in summed]
+        series += [(name, json.loads(labels) + [['pid', worker.split(':')[0]]], value)
+                   for name, labels, worker, value in gauges]
+
+        def sort_key(item):
+            name, labels, _ = item
+            family = _family(name)
+            le = dict(labels).get('le')
+            suffix = name[len(family):]
+            return (family, [p for p in labels if p[0] != 'le'],
+                    suffix != '_bucket', float(le) if le else 0.0, suffix)
+
+        lines = []
+        family = None
+        for name, labels, value in sorted(series, key=sort_key):
+            if _family(name) != family:
+                family = _family(name)
+                kind, text = METRIC_HELP.get(family, ('untyped', ''))
+                lines.append(f"# HELP {family} {text}")
+                lines.append(f"# TYPE {family} {kind}")
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+def _blueprint():
+    if request.blueprint:
+        return request.blueprint
+    return 'static' if request.endpoint == 'static' else ('app' if request.endpoint else 'unmatched')
+
+
+def _family(name):
+    for suffix in ('_bucket', '_sum', '_count'):
+        if name.endswith(suffix) and name[:-len(suffix)] in METRIC_HELP:
+            return name[:-len(suffix)]
+    return name
+
+
+metrics = Metrics()
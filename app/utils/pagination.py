@@ -0,0 +1,45 @@
+"""Opaque keyset-pagination cursors"""
+import json
+import base64
+from datetime import datetime
+
+def encode_task_cursor(task):
+    """Cursor pointing just after task in (completed, due_date, id) order"""
+    payload = [
+        1 if task.completed else 0,
+        task.due_date.isoformat() if task.due_date else None,
+        task.id,
+    ]
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_task_cursor(cursor):
+    """Decode a cursor into (completed, due_date, id); None if malformed"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        completed, due, task_id = json.loads(raw)
+        return (
+            bool(completed),
+            datetime.fromisoformat(due) if due else None,
+            int(task_id),
+        )
+    except (ValueError, TypeError):
+        return None
+
+def encode_search_cursor(tier, last_id):
+    """Cursor pointing just after last_id within a search result tier"""
+    raw = json.dumps([tier, last_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_search_cursor(cursor):
+    """Decode a search cursor into (tier, id); None if malformed"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        tier, last_id = json.loads(raw)
+        return int(tier), int(last_id)
+    except (ValueError, TypeError):
+        return None
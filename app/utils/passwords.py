@@ -0,0 +1,124 @@
+"""Password hashing with configurable cost and optional process-pool offload
+
+Hashes use werkzeug's "method$salt$hash" format, e.g.
+"scrypt:32768:8:1$..." or "pbkdf2:sha256:600000$...". A stored hash whose
+method differs from PASSWORD_HASH_METHOD is reported by needs_rehash(),
+so the login flow can upgrade (or downgrade) it transparently. Short
+settings such as "pbkdf2" or "scrypt" are expanded to the full parameter
+string werkzeug writes, so they compare equal to the hashes they produce.
+
+With PASSWORD_HASH_POOL_SIZE > 0, hashing and verification run in a
+per-worker process pool, and at most PASSWORD_HASH_MAX_PENDING calls
+may be queued at once; further logins fail fast instead of piling up
+behind the CPU. This pays off with threaded workers (gunicorn -k gthread),
+where other requests keep being served while a login is hashed.
+"""
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+
+logger = logging.getLogger(__name__)
+
+
+class HashingBusyError(RuntimeError):
+    """Raised when the hashing pool is saturated"""
+
+
+def _full_method(method):
+    """The "method" prefix werkzeug stores for a (possibly abbreviated) method"""
+    name, *params = method.split(':')
+    if (name, len(params)) in (('scrypt', 3), ('pbkdf2', 2)):
+        return method
+    # Let werkzeug fill in its defaults (and reject unknown methods at startup)
+    return generate_password_hash('x', method).split('$', 1)[0]
+
+
+class PasswordHasher:
+    """Configurable password hashing backend"""
+
+    def __init__(self, app=None):
+        self.method = 'scrypt:32768:8:1'
+        self.pool_size = 0
+        self.timeout = 10
+        self._pool = None
+        self._pool_pid = None
+        self._slots = None
+        self._lock = threading.Lock()
+        self.hash_count = 0
+        self.hash_seconds = 0.0
+        # Callables receiving the duration of every hash/verify (e.g. metrics)
+        self.observers = []
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.method    = _full_method(app.config.get('PASSWORD_HASH_METHOD', self.method))
+        self.pool_size = app.config.get('PASSWORD_HASH_POOL_SIZE', 0)
+        self.timeout   = app.config.get('PASSWORD_HASH_TIMEOUT', 10)
+        max_pending    = app.config.get('PASSWORD_HASH_MAX_PENDING', self.pool_size * 4)
+        self._slots = threading.BoundedSemaphore(max_pending) if self.pool_size else None
+        self.shutdown()
+        app.extensions['password_hasher'] = self
+
+    # ── Public API ──
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, stored_hash, password):
+        if not stored_hash:
+            return False
+        return self._run(check_password_hash, stored_hash, password)
+
+    def needs_rehash(self, stored_hash):
+        """True if the stored hash was made with different parameters"""
+        return bool(stored_hash) and stored_hash.split('$', 1)[0] != self.method
+
+    def stats(self):
+        return {
+            'method':          self.method,
+            'hash_count':      self.hash_count,
+            'hash_seconds':    self.hash_seconds,
+            'avg_ms':          (self.hash_seconds / self.hash_count * 1000) if self.hash_count else 0.0,
+        }
+
+    def shutdown(self):
+        if self._pool is not None and self._pool_pid == os.getpid():
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = None
+        self._pool_pid = None
+
+    # ── Internals ──
+
+    def _executor(self):
+        # Pools don't survive fork, so each gunicorn worker builds its own lazily
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ProcessPoolExecutor(max_workers=self.pool_size)
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def _run(self, fn, *args):
+        start = time.perf_counter()
+        try:
+            if not self.pool_size:
+                return fn(*args)
+            if not self._slots.acquire(timeout=self.timeout):
+                raise HashingBusyError("Password hashing pool is saturated")
+            try:
+                return self._executor().submit(fn, *args).result(timeout=self.timeout)
+            finally:
+                self._slots.release()
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.hash_count += 1
+                self.hash_seconds += elapsed
+            for observer in self.observers:
+                observer(elapsed)
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,48 @@
+"""SQLite connection tuning for multi-worker deployments"""
+import logging
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# PRAGMAs that accept only keywords, everything else must be an integer
+_KEYWORD_PRAGMAS = {
+    'journal_mode': {'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'},
+    'synchronous':  {'OFF', 'NORMAL', 'FULL', 'EXTRA', '0', '1', '2', '3'},
+    'temp_store':   {'DEFAULT', 'FILE', 'MEMORY', '0', '1', '2'},
+}
+
+
+def _pragma_statements(pragmas):
+    statements = []
+    for name, value in pragmas.items():
+        if value is None:
+            continue
+        if name in _KEYWORD_PRAGMAS:
+            value = str(value).upper()
+            if value not in _KEYWORD_PRAGMAS[name]:
+                raise ValueError(f"Invalid value for PRAGMA {name}: {value}")
+        else:
+            value = int(value)
+        statements.append(f"PRAGMA {name}={value}")
+    return statements
+
+
+def configure_sqlite(engine, pragmas):
+    """
+    Apply the PRAGMA profile to every new connection of a SQLite engine.
+    No-op for other databases or an empty profile.
+    """
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+    statements = _pragma_statements(pragmas)
+
+    @event.listens_for(engine, 'connect')
+    def _apply_pragmas(dbapi_conn, connection_record):
+        cursor = dbapi_conn.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+    logger.info(f"SQLite tuning: {', '.join(s[len('PRAGMA '):] for s in statements)}")
@@ -27,18 +27,28 @@ def calculate_goal_progress(goal):
     - Else if target_date set: time elapsed in a 90-day window before target.
     - Otherwise: 0.
     """
+    tasks = goal.tasks if hasattr(goal, 'tasks') else []
+    return progress_from_counts(
+        len(tasks),
+        sum(1 for t in tasks if t.completed),
+        goal.target_date,
+    )
+
+def progress_from_counts(total_tasks, completed_tasks, target_date, today=None):
+    """
+    Goal progress from pre-aggregated task counts, so callers that
+    already grouped tasks in SQL don't need to load the task rows.
+    """
     # Task-based (most meaningful)
-    if hasattr(goal, 'tasks') and goal.tasks:
-        total     = len(goal.tasks)
-        completed = sum(1 for t in goal.tasks if t.completed)
-        return round((completed / total) * 100) if total else 0
+    if total_tasks:
+        return round((completed_tasks / total_tasks) * 100)
 
     # Time-based fallback
-    if not goal.target_date:
+    if not target_date:
         return 0
 
-    today  = date.today()
-    target = goal.target_date.date()
+    today  = today or date.today()
+    target = target_date.date()
 
     if today >= target:
         return 100
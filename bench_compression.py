@@ -0,0 +1,82 @@
+"""
+Response compression benchmark: bytes saved and CPU cost per encoding/level
+
+Seeds one large account (benchmarks.seed) in a scratch SQLite database,
+captures the uncompressed dashboard HTML, a JSON API page and a CSV
+export, then compresses each body with every available encoding and
+level, reporting compressed size, ratio and CPU milliseconds per response.
+
+Usage: python bench_compression.py [--tasks 5000] [--per-page 200] [--repeat 20]
+"""
+import os
+import time
+import logging
+import argparse
+import tempfile
+
+LEVELS = {
+    'gzip': [1, 6, 9],
+    'br':   [1, 4, 6, 11],
+    'zstd': [1, 3, 9],
+}
+
+
+def capture_bodies(tasks, per_page):
+    from app import create_app
+    from benchmarks.seed import seed, bench_email, PASSWORD
+
+    scratch = tempfile.mkdtemp(prefix='performx-compress-')
+    app = create_app('production', {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(scratch, 'bench.db')}",
+        'SCHEMA_STARTUP': 'auto',
+        'SESSION_COOKIE_SECURE': False,
+        'CACHE_BACKEND': 'null',
+        'FRAGMENT_CACHE_BACKEND': 'null',
+        'METRICS_DB_PATH': os.path.join(scratch, 'metrics.db'),
+        'EVENTS_DB_PATH': os.path.join(scratch, 'events.db'),
+        'COMPRESS_ENABLED': False,
+        'TASKS_PER_PAGE': per_page,
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+    })
+    with app.app_context():
+        seed(users=1, goals_per_user=10, tasks=tasks)
+    client = app.test_client()
+    client.post('/login', data={'email': bench_email(0), 'password': PASSWORD})
+    return {
+        'dashboard (html)': client.get('/dashboard').get_data(),
+        'api tasks (json)': client.get(f'/api/v1/tasks?limit={min(per_page, 200)}').get_data(),
+        'export (csv)':     client.get('/data/export/tasks.csv').get_data(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=5000)
+    parser.add_argument('--per-page', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    from app.utils.compression import ResponseCompression, brotli, zstandard
+    available = {'gzip': True, 'br': brotli is not None, 'zstd': zstandard is not None}
+    codec = ResponseCompression()
+
+    for label, body in capture_bodies(args.tasks, args.per_page).items():
+        print(f"\n{label}: {len(body):,} bytes")
+        print(f"{'encoding':<10}{'level':>6}{'bytes':>10}{'ratio':>8}{'saved':>10}{'cpu ms':>9}")
+        for encoding, levels in LEVELS.items():
+            if not available[encoding]:
+                print(f"{encoding:<10}  (not installed)")
+                continue
+            for level in levels:
+                codec.levels = {encoding: level}
+                start = time.thread_time()
+                for _ in range(args.repeat):
+                    out = codec.compress(body, encoding)
+                cpu_ms = (time.thread_time() - start) / args.repeat * 1000
+                print(f"{encoding:<10}{level:>6}{len(out):>10,}{len(out) / len(body):>8.1%}"
+                      f"{len(body) - len(out):>10,}{cpu_ms:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Password hashing benchmark: logins/sec at each hash cost
+
+For every method below, registers a user in a scratch SQLite database and
+times UserService.login_user (hash verification dominates). With
+--threads > 1 logins run concurrently; add --pool N to verify in a
+process pool of N workers (PASSWORD_HASH_POOL_SIZE). The short settings
+"pbkdf2" and "scrypt" are included to check that a login does not
+rehash (and rewrite) a password that already uses the configured method;
+the script exits non-zero if one does.
+
+Usage: python bench_password_hash.py [--logins 20] [--threads 1] [--pool 0]
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+METHODS = [
+    'pbkdf2:sha256:100000',
+    'pbkdf2:sha256:260000',
+    'pbkdf2:sha256:600000',
+    'scrypt:16384:8:1',
+    'scrypt:32768:8:1',
+    'scrypt:65536:8:1',
+    'pbkdf2',
+    'scrypt',
+]
+
+
+def bench(method, logins, threads, pool):
+    from app import create_app
+    from app.services import UserService
+    from app.models import User
+    from app.utils.passwords import password_hasher
+
+    scratch = tempfile.mkdtemp(prefix='performx-hash-')
+    db_path = os.path.join(scratch, 'bench.db')
+    app = create_app('production', {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{db_path}",
+        'SCHEMA_STARTUP': 'auto',
+        'CACHE_BACKEND': 'null',
+        'FRAGMENT_CACHE_BACKEND': 'null',
+        'METRICS_DB_PATH': os.path.join(scratch, 'metrics.db'),
+        'EVENTS_DB_PATH': os.path.join(scratch, 'events.db'),
+        'PASSWORD_HASH_METHOD': method,
+        'PASSWORD_HASH_POOL_SIZE': pool,
+        'PASSWORD_HASH_MAX_PENDING': max(threads, 1) * 2,
+    })
+    with app.app_context():
+        UserService.register_user('Bench', 'bench@example.com', 'benchpass', 'benchpass')
+
+    def login(_):
+        with app.app_context():
+            user, _ = UserService.login_user('bench@example.com', 'benchpass')
+            return user is not None
+
+    def stored_hash():
+        with app.app_context():
+            return User.query.filter_by(email='bench@example.com').one().password
+
+    login(0)  # warm up (and start the pool)
+    before = stored_hash()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        ok = sum(executor.map(login, range(logins)))
+    elapsed = time.perf_counter() - start
+    password_hasher.shutdown()
+    return ok, elapsed, stored_hash() != before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--logins', type=int, default=20)
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--pool', type=int, default=0)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    print(f"{args.logins} logins, {args.threads} thread(s), pool size {args.pool}")
+    print(f"{'method':<24}{'ms/login':>10}{'logins/sec':>12}")
+    failed = False
+    for method in METHODS:
+        ok, elapsed, rehashed = bench(method, args.logins, args.threads, args.pool)
+        if ok != args.logins:
+            print(f"{method:<24}  {args.logins - ok} logins failed")
+            failed = True
+            continue
+        print(f"{method:<24}{elapsed / ok * 1000:>10.1f}{ok / elapsed:>12.1f}"
+              + ("  rehashed on login" if rehashed else ""))
+        failed = failed or rehashed
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
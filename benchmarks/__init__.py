@@ -0,0 +1,9 @@
+"""
+Reproducible load-test and benchmark suite
+
+    python -m benchmarks.run --users 20 --tasks 20000      # seed + run in-process
+    python -m benchmarks.run --base-url http://127.0.0.1:8000 --no-seed
+    python -m benchmarks.compare old.json new.json         # flag regressions
+
+See benchmarks/run.py for all options.
+"""
@@ -0,0 +1,70 @@
+"""Minimal HTTP clients with one interface for in-process and live-server runs"""
+import json as jsonlib
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+
+
+class Response:
+    __slots__ = ('status', 'headers', 'body')
+
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return jsonlib.loads(self.body)
+
+
+class TestClient:
+    """Flask test client (no network, no WSGI server); one per virtual user"""
+
+    def __init__(self, app):
+        self._client = app.test_client()
+
+    def request(self, method, path, data=None, json=None, headers=None):
+        response = self._client.open(path, method=method, data=data, json=json,
+                                     headers=headers or {})
+        body = response.get_data()  # drains streamed responses too
+        return Response(response.status_code, response.headers, body)
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # Each request is timed on its own; redirects are not followed
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class _LocalCookiePolicy(DefaultCookiePolicy):
+    # Production sets SESSION_COOKIE_SECURE; a local gunicorn is plain HTTP
+    def return_ok_secure(self, cookie, request):
+        return True
+
+
+class HTTPClient:
+    """urllib client with a cookie jar, for a locally running gunicorn"""
+
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self._opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(CookieJar(_LocalCookiePolicy())), _NoRedirect)
+
+    def request(self, method, path, data=None, json=None, headers=None):
+        headers = dict(headers or {})
+        body = None
+        if json is not None:
+            body = jsonlib.dumps(json).encode()
+            headers['Content-Type'] = 'application/json'
+        elif data is not None:
+            body = urllib.parse.urlencode(data, doseq=True).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        req = urllib.request.Request(self.base_url + path, data=body,
+                                     headers=headers, method=method)
+        try:
+            with self._opener.open(req, timeout=self.timeout) as response:
+                return Response(response.status, response.headers, response.read())
+        except urllib.error.HTTPError as e:
+            return Response(e.code, e.headers, e.read())
@@ -0,0 +1,52 @@
+"""
+Compare two benchmark result files and flag regressions
+
+Usage: python -m benchmarks.compare baseline.json candidate.json [--threshold 10] [--metric p95_ms]
+
+Exits with status 1 when any operation's metric got worse by more than
+--threshold percent, so it can gate CI.
+"""
+import sys
+import json
+import argparse
+
+
+def compare(baseline, candidate, metric, threshold):
+    """Yield (operation, old, new, change_pct, regressed) for operations in both runs"""
+    for name, new in candidate['operations'].items():
+        old = baseline['operations'].get(name)
+        if not old or not old.get(metric):
+            continue
+        change = (new[metric] - old[metric]) / old[metric] * 100
+        # For throughput, lower is worse
+        worse = -change if metric == 'throughput_rps' else change
+        yield name, old[metric], new[metric], change, worse > threshold
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--metric', default='p95_ms')
+    parser.add_argument('--threshold', type=float, default=10.0, help="Allowed change in percent")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    print(f"{baseline['meta'].get('git_revision')} -> {candidate['meta'].get('git_revision')} "
+          f"({args.metric}, threshold {args.threshold:.0f}%)")
+    print(f"{'operation':<18}{'baseline':>10}{'candidate':>11}{'change':>9}")
+    regressions = 0
+    for name, old, new, change, regressed in compare(baseline, candidate, args.metric,
+                                                     args.threshold):
+        regressions += regressed
+        flag = '  REGRESSION' if regressed else ''
+        print(f"{name:<18}{old:>10.2f}{new:>11.2f}{change:>+8.1f}%{flag}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
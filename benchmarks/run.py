@@ -0,0 +1,203 @@
+"""
+Seed a synthetic data set and measure request latency and throughput
+
+In-process (default): builds the app with the production config on a scratch
+SQLite database, seeds it, and drives it through the Flask test client.
+
+Against a running server:
+
+    python -m benchmarks.run --seed-only --database sqlite:////tmp/bench.db
+    DATABASE_URL=sqlite:////tmp/bench.db gunicorn -w 4 -b 127.0.0.1:8000 run:app
+    python -m benchmarks.run --base-url http://127.0.0.1:8000 --no-seed
+
+Results (per-operation p50/p90/p95/p99 latency, error counts and
+throughput, plus run parameters and git revision) are written as JSON;
+compare two runs with `python -m benchmarks.compare`.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.client import TestClient, HTTPClient
+from benchmarks.scenarios import DEFAULT_MIX, Recorder, make_users, run_virtual_user
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(recorder, wall_seconds):
+    operations = {}
+    for name in sorted(set(recorder.samples) | set(recorder.errors)):
+        values = sorted(recorder.samples.get(name, []))
+        stats = {
+            'count':  len(values),
+            'errors': recorder.errors.get(name, 0),
+            'mean_ms': (sum(values) / len(values) * 1000) if values else 0.0,
+            'max_ms':  values[-1] * 1000 if values else 0.0,
+            'throughput_rps': len(values) / wall_seconds if wall_seconds else 0.0,
+        }
+        for pct in PERCENTILES:
+            stats[f'p{pct}_ms'] = percentile(values, pct) * 1000
+        operations[name] = stats
+    total = sum(s['count'] for s in operations.values())
+    return operations, {
+        'requests': total,
+        'errors': sum(s['errors'] for s in operations.values()),
+        'wall_seconds': wall_seconds,
+        'throughput_rps': total / wall_seconds if wall_seconds else 0.0,
+    }
+
+
+def parse_mix(value):
+    mix = dict(DEFAULT_MIX)
+    for item in filter(None, (value or '').split(',')):
+        name, _, weight = item.partition('=')
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Unknown operation '{name}'")
+        mix[name] = float(weight)
+    return [(name, weight) for name, weight in mix.items() if weight > 0]
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_app(args):
+    from app import create_app
+    scratch = tempfile.mkdtemp(prefix='performx-bench-')
+    database = args.database or f"sqlite:///{os.path.join(scratch, 'bench.db')}"
+    overrides = {
+        'SQLALCHEMY_DATABASE_URI': database,
+        'SCHEMA_STARTUP': 'auto',
+        'SESSION_COOKIE_SECURE': False,
+        'CACHE_SQLITE_PATH': os.path.join(scratch, 'cache.db'),
+        'FRAGMENT_CACHE_SQLITE_PATH': os.path.join(scratch, 'fragment_cache.db'),
+        'METRICS_DB_PATH': os.path.join(scratch, 'metrics.db'),
+        'EVENTS_DB_PATH': os.path.join(scratch, 'events.db'),
+        'USER_CACHE_SQLITE_PATH': os.path.join(scratch, 'user_cache.db'),
+    }
+    if args.cache_backend:
+        overrides['CACHE_BACKEND'] = args.cache_backend
+    if args.fragment_cache:
+        overrides['FRAGMENT_CACHE_BACKEND'] = args.fragment_cache
+    if args.hash_method:
+        overrides['PASSWORD_HASH_METHOD'] = args.hash_method
+    return create_app('production', overrides), database
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PerformX load test / benchmark")
+    data = parser.add_argument_group('data set')
+    data.add_argument('--users', type=int, default=10)
+    data.add_argument('--goals-per-user', type=int, default=5)
+    data.add_argument('--tasks', type=int, default=10000, help="Total tasks across all users")
+    data.add_argument('--skew', type=float, default=1.0,
+                      help="Zipf exponent of tasks per user (0 = uniform)")
+    data.add_argument('--overdue', type=float, default=0.15, help="Fraction of overdue tasks")
+    data.add_argument('--completed', type=float, default=0.4, help="Fraction of completed tasks")
+    data.add_argument('--linked', type=float, default=0.5, help="Fraction of tasks linked to a goal")
+    data.add_argument('--seed', type=int, default=42)
+    data.add_argument('--database', help="Database URI (default: scratch SQLite file)")
+    data.add_argument('--no-seed', action='store_true', help="Reuse an already seeded database")
+    data.add_argument('--seed-only', action='store_true', help="Seed and exit")
+
+    load = parser.add_argument_group('load')
+    load.add_argument('--base-url', help="Drive a running server instead of the test client")
+    load.add_argument('--concurrency', type=int, default=1, help="Virtual users (threads)")
+    load.add_argument('--iterations', type=int, default=200, help="Operations per virtual user")
+    load.add_argument('--warmup', type=int, default=20, help="Untimed operations per virtual user")
+    load.add_argument('--mix', help="Operation weights, e.g. dashboard=50,login=0")
+    load.add_argument('--cache-backend', choices=['memory', 'sqlite', 'null'])
+    load.add_argument('--fragment-cache', choices=['memory', 'sqlite', 'null'],
+                      help="FRAGMENT_CACHE_BACKEND ('null' renders every fragment)")
+    load.add_argument('--hash-method', help="PASSWORD_HASH_METHOD for in-process runs")
+    parser.add_argument('--output', help="Results file (default: benchmarks/results/<timestamp>.json)")
+    args = parser.parse_args(argv)
+    mix = parse_mix(args.mix)
+    logging.disable(logging.WARNING)
+
+    app = database = None
+    if not args.base_url or args.seed_only:
+        app, database = build_app(args)
+
+    seed_summary = None
+    if not args.no_seed:
+        from benchmarks.seed import seed
+        start = time.perf_counter()
+        with app.app_context():
+            seed_summary = seed(args.users, args.goals_per_user, args.tasks, args.skew,
+                                args.overdue, args.completed, args.linked, args.seed)
+        seed_summary['seconds'] = time.perf_counter() - start
+        print(f"Seeded {args.users} users, {seed_summary['goals']} goals, {args.tasks} tasks "
+              f"in {seed_summary['seconds']:.1f}s ({database})")
+    if args.seed_only:
+        return 0
+
+    if args.base_url:
+        client_factory = lambda: HTTPClient(args.base_url)
+    else:
+        client_factory = lambda: TestClient(app)
+    users = make_users(client_factory, args.users, args.concurrency, args.seed)
+    for user in users:
+        user.setup()
+
+    recorder = Recorder()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(
+            lambda u: run_virtual_user(u, mix, args.iterations, args.warmup, recorder), users))
+    wall = time.perf_counter() - start
+    operations, totals = summarize(recorder, wall)
+
+    results = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'target': args.base_url or 'test-client',
+            'database': database,
+            'args': vars(args),
+            'mix': dict(mix),
+            'seed': seed_summary,
+        },
+        'totals': totals,
+        'operations': operations,
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR, datetime.utcnow().strftime('%Y%m%dT%H%M%SZ') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    print(f"{'operation':<18}{'count':>7}{'err':>5}{'p50 ms':>9}{'p95 ms':>9}"
+          f"{'p99 ms':>9}{'req/s':>9}")
+    for name, s in operations.items():
+        print(f"{name:<18}{s['count']:>7}{s['errors']:>5}{s['p50_ms']:>9.2f}"
+              f"{s['p95_ms']:>9.2f}{s['p99_ms']:>9.2f}{s['throughput_rps']:>9.1f}")
+    print(f"{totals['requests']} requests in {wall:.1f}s "
+          f"({totals['throughput_rps']:.1f} req/s, {totals['errors']} errors) -> {output}")
+    return 1 if totals['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
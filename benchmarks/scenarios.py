@@ -0,0 +1,195 @@
+"""Benchmark operations and the virtual-user run loop"""
+import time
+import random
+import threading
+from datetime import date, timedelta
+from urllib.parse import urlencode
+from benchmarks.seed import PASSWORD, bench_email
+
+# Relative frequency of each operation in the default mix
+DEFAULT_MIX = {
+    'dashboard':       30,
+    'tasks_page':      10,
+    'api_tasks':       10,
+    'api_tasks_304':   10,
+    'api_goals':        5,
+    'api_trends':       5,
+    'api_search':       5,
+    'task_add':        10,
+    'api_task_create':  5,
+    'task_complete':   10,
+    'task_delete':      5,
+    'login':            5,
+}
+
+
+class OperationError(Exception):
+    """An operation could not be run (e.g. no open task left to complete)"""
+
+
+class VirtualUser:
+    """One logged-in benchmark user with its own client and cookie jar"""
+
+    def __init__(self, client, index, rng):
+        self.client = client
+        self.index = index
+        self.email = bench_email(index)
+        self.rng = rng
+        self.open_task_ids = []
+        self.created_task_ids = []
+        self.goal_ids = []
+        self.next_cursor = None
+        self.etag = None
+        self.added = 0
+
+    # ── Setup (untimed) ──
+
+    def setup(self):
+        self._login()
+        response = self.client.request('GET', '/api/v1/goals')
+        self.goal_ids = [g['id'] for g in response.json().get('goals', [])]
+        self._refill_open_tasks()
+
+    def _login(self):
+        response = self.client.request('POST', '/login',
+                                       data={'email': self.email, 'password': PASSWORD})
+        if response.status != 302:
+            raise OperationError(f"Login failed for {self.email} ({response.status})")
+        return response
+
+    def _refill_open_tasks(self):
+        cursor = None
+        while len(self.open_task_ids) < 200:
+            path = '/api/v1/tasks?limit=200' + (f'&cursor={cursor}' if cursor else '')
+            page = self.client.request('GET', path).json()
+            self.open_task_ids.extend(t['id'] for t in page['tasks'] if not t['completed'])
+            cursor = page.get('next_cursor')
+            if not cursor:
+                break
+        self.rng.shuffle(self.open_task_ids)
+
+    # ── Operations: each returns (response, expected statuses) ──
+
+    def op_dashboard(self):
+        return self.client.request('GET', '/dashboard'), (200,)
+
+    def op_tasks_page(self):
+        path = '/tasks/page' + (f'?cursor={self.next_cursor}' if self.next_cursor else '')
+        response = self.client.request('GET', path)
+        if response.status == 200:
+            self.next_cursor = response.json().get('next_cursor')
+        return response, (200,)
+
+    def op_api_tasks(self):
+        response = self.client.request('GET', '/api/v1/tasks')
+        self.etag = response.headers.get('ETag')
+        return response, (200,)
+
+    def op_api_tasks_304(self):
+        # 200 is still correct when a write happened since the last listing
+        headers = {'If-None-Match': self.etag} if self.etag else {}
+        response = self.client.request('GET', '/api/v1/tasks', headers=headers)
+        self.etag = response.headers.get('ETag')
+        return response, (200, 304)
+
+    def op_api_goals(self):
+        return self.client.request('GET', '/api/v1/goals'), (200,)
+
+    def op_api_trends(self):
+        start = (date.today() - timedelta(days=364)).isoformat()
+        return self.client.request('GET', f'/api/v1/stats/daily?start={start}'), (200,)
+
+    def op_api_search(self):
+        # Seeded titles are "Task <n>": a common word plus a number prefix
+        query = f"task {self.rng.randint(1, 999)}"
+        return self.client.request('GET', '/api/v1/search?' + urlencode({'q': query})), (200,)
+
+    def op_task_add(self):
+        self.added += 1
+        due = date.today() + timedelta(days=self.rng.randint(-5, 30))
+        data = {
+            'title': f"Bench add {self.added}",
+            'description': '',
+            'due_date': due.strftime('%Y-%m-%d'),
+            'priority': self.rng.choice(['High', 'Medium', 'Low']),
+        }
+        if self.goal_ids and self.rng.random() < 0.5:
+            data['goal_id'] = self.rng.choice(self.goal_ids)
+        return self.client.request('POST', '/tasks/add', data=data), (302,)
+
+    def op_api_task_create(self):
+        self.added += 1
+        response = self.client.request('POST', '/api/v1/tasks', json={
+            'title': f"Bench api {self.added}", 'priority': 'Medium'})
+        if response.status == 201:
+            self.created_task_ids.append(response.json()['id'])
+        return response, (201,)
+
+    def op_task_complete(self):
+        if not self.open_task_ids:
+            self._refill_open_tasks()
+        if not self.open_task_ids:
+            raise OperationError("No open task left to complete")
+        task_id = self.open_task_ids.pop()
+        return self.client.request('POST', f'/tasks/{task_id}/complete'), (302,)
+
+    def op_task_delete(self):
+        if not self.created_task_ids:
+            # Only delete benchmark-created rows so the seeded data set stays stable
+            response = self.client.request('POST', '/api/v1/tasks', json={'title': 'Bench delete'})
+            if response.status != 201:
+                raise OperationError(f"Could not create a task to delete ({response.status})")
+            self.created_task_ids.append(response.json()['id'])
+        task_id = self.created_task_ids.pop()
+        return self.client.request('POST', f'/tasks/{task_id}/delete'), (302,)
+
+    def before_login(self):
+        # Untimed: otherwise /login short-circuits without verifying the password
+        self.client.request('GET', '/logout')
+
+    def op_login(self):
+        return self._login(), (302,)
+
+
+def run_virtual_user(user, operations, iterations, warmup, record):
+    """Run `iterations` operations drawn from `operations` (name, weight) pairs"""
+    names = [name for name, _ in operations]
+    weights = [weight for _, weight in operations]
+    for i in range(warmup + iterations):
+        name = user.rng.choices(names, weights)[0]
+        try:
+            prepare = getattr(user, f'before_{name}', None)
+            if prepare:
+                prepare()
+            start = time.perf_counter()
+            response, expected = getattr(user, f'op_{name}')()
+            elapsed = time.perf_counter() - start
+            ok = response.status in expected
+        except OperationError:
+            continue
+        except Exception:
+            elapsed, ok = 0.0, False
+        if i >= warmup:
+            record(name, elapsed, ok)
+
+
+class Recorder:
+    """Thread-safe collection of (operation, seconds, ok) samples"""
+
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, name, elapsed, ok):
+        with self._lock:
+            if ok:
+                self.samples.setdefault(name, []).append(elapsed)
+            else:
+                self.errors[name] = self.errors.get(name, 0) + 1
+
+
+def make_users(client_factory, users, concurrency, seed_value):
+    """One VirtualUser per thread, spread over the seeded benchmark accounts"""
+    return [VirtualUser(client_factory(), i % users, random.Random(seed_value + i))
+            for i in range(concurrency)]
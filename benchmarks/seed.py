@@ -0,0 +1,117 @@
+"""Synthetic data generator for benchmarks"""
+import random
+from datetime import datetime, timedelta
+from app.models import db, User, Task, Goal
+from app.utils.passwords import password_hasher
+from app.services.goal_service import GoalService
+from app.services.stats_service import StatsService
+
+PASSWORD = 'benchpass'
+PRIORITY_WEIGHTS = {'High': 0.2, 'Medium': 0.5, 'Low': 0.3}
+INSERT_BATCH = 5000
+
+
+def bench_email(i):
+    return f"bench{i}@example.com"
+
+
+def skewed_counts(total, buckets, skew, rng):
+    """
+    Split total across buckets with a Zipf-like distribution
+    (skew=0 is uniform; larger values concentrate rows on the first buckets).
+    """
+    weights = [1.0 / ((rank + 1) ** skew) for rank in range(buckets)]
+    scale = total / sum(weights)
+    counts = [int(w * scale) for w in weights]
+    for i in range(total - sum(counts)):
+        counts[i % buckets] += 1
+    rng.shuffle(counts)
+    return counts
+
+
+def seed(users=10, goals_per_user=5, tasks=10000, skew=1.0, overdue=0.15,
+         completed=0.4, linked=0.5, undated=0.1, seed_value=42, history_days=365):
+    """
+    Insert benchmark users (bench<i>@example.com / benchpass) with goals and
+    tasks, created over the last history_days. Returns a summary dict.
+    Existing benchmark users are replaced.
+    """
+    rng = random.Random(seed_value)
+    today = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+    now = datetime.now().replace(microsecond=0)
+    priorities, priority_weights = zip(*PRIORITY_WEIGHTS.items())
+
+    emails = [bench_email(i) for i in range(users)]
+    for user in User.query.filter(User.email.in_(emails)).all():
+        db.session.delete(user)
+    db.session.commit()
+
+    password = password_hasher.hash(PASSWORD)
+    db.session.execute(db.insert(User), [
+        {'full_name': f"Bench User {i}", 'email': email, 'password': password}
+        for i, email in enumerate(emails)
+    ])
+    db.session.commit()
+    user_ids = [uid for (uid,) in db.session.query(User.id)
+                .filter(User.email.in_(emails)).order_by(User.id)]
+
+    db.session.execute(db.insert(Goal), [
+        {'title': f"Goal {g}", 'description': "Benchmark goal", 'user_id': uid,
+         'target_date': today + timedelta(days=rng.randint(-30, 120)), 'completed': False}
+        for uid in user_ids for g in range(goals_per_user)
+    ])
+    db.session.commit()
+    goals_by_user = {}
+    for goal_id, uid in db.session.query(Goal.id, Goal.user_id).filter(Goal.user_id.in_(user_ids)):
+        goals_by_user.setdefault(uid, []).append(goal_id)
+
+    batch = []
+    counts = skewed_counts(tasks, len(user_ids), skew, rng)
+    for uid, count in zip(user_ids, counts):
+        user_goals = goals_by_user.get(uid, [])
+        for n in range(count):
+            is_done = rng.random() < completed
+            roll = rng.random()
+            if roll < undated:
+                due = None
+            elif roll < undated + overdue:
+                due = today - timedelta(days=rng.randint(1, 60))
+            else:
+                due = today + timedelta(days=rng.randint(0, 90))
+            created = today - timedelta(days=rng.randint(0, history_days),
+                                        seconds=rng.randint(0, 86399))
+            batch.append({
+                'title': f"Task {n}",
+                'description': "Benchmark task" if rng.random() < 0.5 else None,
+                'due_date': due,
+                'priority': rng.choices(priorities, priority_weights)[0],
+                'completed': is_done,
+                'user_id': uid,
+                'goal_id': rng.choice(user_goals) if user_goals and rng.random() < linked else None,
+                'created_at': created,
+                'completed_at': min(created + timedelta(hours=rng.randint(1, 24 * 14)), now)
+                                if is_done else None,
+            })
+            if len(batch) >= INSERT_BATCH:
+                db.session.execute(db.insert(Task), batch)
+                db.session.commit()
+                batch = []
+    if batch:
+        db.session.execute(db.insert(Task), batch)
+        db.session.commit()
+    # Bulk inserts bypass TaskService, so fill in the goal counters and rollup afterwards
+    GoalService.reconcile_task_counts()
+    StatsService.rebuild()
+
+    return {
+        'users': users,
+        'goals': users * goals_per_user,
+        'tasks': tasks,
+        'max_tasks_per_user': max(counts) if counts else 0,
+        'min_tasks_per_user': min(counts) if counts else 0,
+        'skew': skew,
+        'overdue': overdue,
+        'completed': completed,
+        'linked': linked,
+        'seed': seed_value,
+    }
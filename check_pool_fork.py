@@ -0,0 +1,119 @@
+"""
+Connection pool fork check: do forked workers share the parent's connections?
+
+Opens a pooled connection in the parent (as gunicorn --preload or a
+startup schema check would), forks worker processes, and has each worker
+check out connections from several threads. Every connection is tagged
+with the pid that opened it, so a worker that got an inherited connection
+is caught. Runs twice against a scratch SQLite file:
+- a plain SQLAlchemy engine, which shows the problem;
+- the app's engine (DB_POOL profile + configure_pool), which must not
+  share any connection with its parent.
+
+Exits non-zero if any app worker used a connection opened by its parent.
+The same check applies to Postgres: point --url at a server to use it.
+
+Usage: python check_pool_fork.py [--workers 4] [--threads 4] [--url sqlite:///...]
+"""
+import os
+import sys
+import logging
+import argparse
+import tempfile
+import threading
+import multiprocessing
+
+from sqlalchemy import create_engine, event, text
+
+
+def _tag_connections(engine):
+    """Record the pid that opened the connection of every checkout"""
+    checkouts = []
+
+    @event.listens_for(engine, 'connect')
+    def _connected(dbapi_conn, record):
+        record.info.setdefault('pid', os.getpid())
+
+    @event.listens_for(engine, 'checkout')
+    def _checked_out(dbapi_conn, record, proxy):
+        checkouts.append(record.info.get('pid'))
+
+    return checkouts
+
+
+def _worker(engine, checkouts, threads, results):
+    del checkouts[:]  # the parent's, copied by fork
+
+    def use_pool():
+        for _ in range(5):
+            with engine.connect() as conn:
+                conn.execute(text('SELECT 1')).scalar()
+
+    pool = [threading.Thread(target=use_pool) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    inherited = sum(1 for pid in checkouts if pid != os.getpid())
+    results.put((os.getpid(), len(checkouts), inherited))
+
+
+def run(label, engine, checkouts, workers, threads):
+    # The parent holds a pooled connection when the workers are forked
+    with engine.connect() as conn:
+        conn.execute(text('SELECT 1')).scalar()
+
+    ctx = multiprocessing.get_context('fork')
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(engine, checkouts, threads, results))
+             for _ in range(workers)]
+    for p in procs:
+        p.start()
+    rows = [results.get(timeout=60) for _ in procs]
+    for p in procs:
+        p.join()
+
+    shared = 0
+    print(f"\n{label}")
+    print(f"{'worker pid':>11}{'checkouts':>11}{'inherited':>11}")
+    for pid, total, inherited in sorted(rows):
+        shared += 1 if inherited else 0
+        print(f"{pid:>11}{total:>11}{inherited:>11}")
+    print(f"{shared}/{workers} workers used a connection opened by the parent")
+    return shared
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--url', help="database URL (default: a scratch SQLite file)")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    scratch = tempfile.mkdtemp(prefix='performx-pool-')
+    url = args.url or f"sqlite:///{os.path.join(scratch, 'pool.db')}"
+
+    plain = create_engine(url)
+    run("plain engine (library defaults)", plain, _tag_connections(plain),
+        args.workers, args.threads)
+
+    from app import create_app
+    from app.models import db
+    app = create_app('production', {
+        'SQLALCHEMY_DATABASE_URI': url,
+        'SCHEMA_STARTUP': 'off',
+        'CACHE_BACKEND': 'null',
+        'FRAGMENT_CACHE_BACKEND': 'null',
+        'METRICS_ENABLED': False,
+        'EVENTS_ENABLED': False,
+    })
+    with app.app_context():
+        engine = db.engine
+    shared = run("app engine (DB_POOL profile, configure_pool)", engine, _tag_connections(engine),
+                 args.workers, args.threads)
+    sys.exit(1 if shared else 0)
+
+
+if __name__ == '__main__':
+    main()
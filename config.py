@@ -10,6 +10,126 @@ class Config:
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = 'Lax'
     JSON_SORT_KEYS = False
+    TASKS_PER_PAGE = int(os.environ.get('TASKS_PER_PAGE', 50))
+
+    # Schema handling in create_app: 'auto' sets up the schema only when the
+    # recorded version is behind, 'check' just logs an error, 'off' skips it.
+    # Production runs `flask preflight` once before starting gunicorn.
+    SCHEMA_STARTUP = os.environ.get('SCHEMA_STARTUP', 'auto')
+
+    # Applied to every SQLite connection (ignored for other databases).
+    # WAL lets readers proceed while a writer commits; busy_timeout makes
+    # writers wait for the lock instead of failing immediately.
+    SQLITE_PRAGMAS = {
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous':  os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        'cache_size':   int(os.environ.get('SQLITE_CACHE_SIZE', -20000)),  # negative = KiB
+        'mmap_size':    int(os.environ.get('SQLITE_MMAP_SIZE', 128 * 1024 * 1024)),
+        'temp_store':   os.environ.get('SQLITE_TEMP_STORE', 'MEMORY'),
+    }
+    # Connection pool of file/server databases (in-memory SQLite keeps its
+    # StaticPool). Size it to the threads per gunicorn worker; checkouts beyond
+    # size + overflow wait up to pool_timeout seconds. Connections are recycled
+    # after pool_recycle seconds and pinged before use, and each worker drops
+    # connections inherited through fork. SQLALCHEMY_ENGINE_OPTIONS overrides.
+    DB_POOL = {
+        'pool_size':     int(os.environ.get('DB_POOL_SIZE', 8)),
+        'max_overflow':  int(os.environ.get('DB_POOL_MAX_OVERFLOW', 4)),
+        'pool_timeout':  float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        'pool_recycle':  int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes'),
+    }
+    # Log pool state and connect/checkout/invalidate counts every N seconds (0 disables)
+    DB_POOL_STATS_LOG_INTERVAL = int(os.environ.get('DB_POOL_STATS_LOG_INTERVAL', 0))
+    # Service writes that hit a transient lock error are retried with backoff
+    DB_LOCK_RETRIES = int(os.environ.get('DB_LOCK_RETRIES', 5))
+    DB_LOCK_RETRY_BACKOFF = float(os.environ.get('DB_LOCK_RETRY_BACKOFF', 0.05))
+
+    # Analytics cache: 'memory' (per-worker LRU), 'sqlite' (shared file) or 'null'
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 1024))
+    CACHE_DEFAULT_TTL = int(os.environ.get('CACHE_DEFAULT_TTL', 300))
+    CACHE_SQLITE_PATH = os.environ.get('CACHE_SQLITE_PATH')
+    # Log hit/miss counters every N lookups (0 disables)
+    CACHE_STATS_LOG_INTERVAL = int(os.environ.get('CACHE_STATS_LOG_INTERVAL', 0))
+
+    # Logged-in user identity cache (same backend options as CACHE_*).
+    # With the per-worker memory backend, a profile change made through
+    # another worker is picked up after at most USER_CACHE_DEFAULT_TTL seconds.
+    USER_CACHE_BACKEND = os.environ.get('USER_CACHE_BACKEND', 'memory')
+    USER_CACHE_MAX_ENTRIES = int(os.environ.get('USER_CACHE_MAX_ENTRIES', 2048))
+    USER_CACHE_DEFAULT_TTL = int(os.environ.get('USER_CACHE_DEFAULT_TTL', 60))
+
+    # Rendered template fragments ({% cache %} in dashboard.html), keyed by the
+    # user's data version; 'null' turns fragment caching off.
+    FRAGMENT_CACHE_BACKEND = os.environ.get('FRAGMENT_CACHE_BACKEND', 'memory')
+    FRAGMENT_CACHE_MAX_ENTRIES = int(os.environ.get('FRAGMENT_CACHE_MAX_ENTRIES', 4096))
+    FRAGMENT_CACHE_DEFAULT_TTL = int(os.environ.get('FRAGMENT_CACHE_DEFAULT_TTL', 600))
+    FRAGMENT_CACHE_SQLITE_PATH = os.environ.get('FRAGMENT_CACHE_SQLITE_PATH')
+
+    # Password hashing: werkzeug method string (cost is part of it, e.g.
+    # 'scrypt:32768:8:1' or 'pbkdf2:sha256:600000'). Stored hashes made with
+    # other parameters are rehashed on the next successful login.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    # >0 runs hashing in a per-worker process pool of this size
+    PASSWORD_HASH_POOL_SIZE = int(os.environ.get('PASSWORD_HASH_POOL_SIZE', 0))
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 8))
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
+
+    # Per-request query count / SQL / render timing with Server-Timing headers
+    # (off by default); requests over either budget are logged (0 disables).
+    # INSTRUMENTATION_TRACEMALLOC also records peak allocations, at a real cost.
+    INSTRUMENTATION_ENABLED = os.environ.get('INSTRUMENTATION_ENABLED', '').lower() in ('1', 'true', 'yes')
+    INSTRUMENTATION_BUDGET_MS = float(os.environ.get('INSTRUMENTATION_BUDGET_MS', 500))
+    INSTRUMENTATION_QUERY_BUDGET = int(os.environ.get('INSTRUMENTATION_QUERY_BUDGET', 0))
+    INSTRUMENTATION_TRACEMALLOC = os.environ.get('INSTRUMENTATION_TRACEMALLOC', '').lower() in ('1', 'true', 'yes')
+    INSTRUMENTATION_SERVER_TIMING = True
+
+    # Prometheus /metrics: workers flush their totals to a shared SQLite file
+    # (instance/metrics.db unless METRICS_DB_PATH) at most every interval seconds.
+    # Scrapers must send "Authorization: Bearer <METRICS_TOKEN>" when it is set;
+    # with METRICS_REQUIRE_TOKEN, /metrics is not served at all without one.
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5))
+    METRICS_DB_PATH = os.environ.get('METRICS_DB_PATH')
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    METRICS_REQUIRE_TOKEN = os.environ.get('METRICS_REQUIRE_TOKEN', '').lower() in ('1', 'true', 'yes')
+
+    # url_for('static') points at the content-hashed copies built by
+    # `flask assets build` (when app/static/dist/manifest.json exists); they
+    # are served with an immutable Cache-Control of this many seconds.
+    STATIC_FINGERPRINTING = os.environ.get('STATIC_FINGERPRINTING', 'true').lower() in ('1', 'true', 'yes')
+    STATIC_IMMUTABLE_MAX_AGE = int(os.environ.get('STATIC_IMMUTABLE_MAX_AGE', 31536000))
+
+    # Compression of HTML/JSON/export responses: first of COMPRESS_ALGORITHMS
+    # the client accepts (br needs `brotli`, zstd needs `zstandard`). Buffered
+    # bodies under COMPRESS_MIN_SIZE bytes are sent uncompressed.
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    COMPRESS_ALGORITHMS = tuple(os.environ.get('COMPRESS_ALGORITHMS', 'br,zstd,gzip').split(','))
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 6))              # gzip 1-9
+    COMPRESS_BR_QUALITY = int(os.environ.get('COMPRESS_BR_QUALITY', 4))    # brotli 0-11
+    COMPRESS_ZSTD_LEVEL = int(os.environ.get('COMPRESS_ZSTD_LEVEL', 3))    # zstd 1-22
+    COMPRESS_MIMETYPES = ('text/html', 'application/json', 'application/x-ndjson',
+                          'text/csv', 'text/plain')
+
+    # Live dashboard updates (Server-Sent Events on /events). Writes are logged
+    # to a shared SQLite file (instance/events.db unless EVENTS_DB_PATH) that one
+    # thread per worker polls; each stream buffers at most EVENTS_BUFFER_SIZE
+    # events and is closed after EVENTS_STREAM_MAX_SECONDS (the browser
+    # reconnects and resumes). Needs threaded gunicorn workers (-k gthread):
+    # each open stream holds one request thread, so a worker serves at most
+    # EVENTS_MAX_STREAMS of them (keep it well below --threads); further
+    # dashboards get 204 and fall back to patching after their own writes.
+    EVENTS_ENABLED = os.environ.get('EVENTS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    EVENTS_DB_PATH = os.environ.get('EVENTS_DB_PATH')
+    EVENTS_POLL_INTERVAL = float(os.environ.get('EVENTS_POLL_INTERVAL', 0.5))
+    EVENTS_HEARTBEAT = float(os.environ.get('EVENTS_HEARTBEAT', 15))
+    EVENTS_BUFFER_SIZE = int(os.environ.get('EVENTS_BUFFER_SIZE', 100))
+    EVENTS_STREAM_MAX_SECONDS = float(os.environ.get('EVENTS_STREAM_MAX_SECONDS', 300))
+    EVENTS_RETENTION = int(os.environ.get('EVENTS_RETENTION', 600))
+    EVENTS_MAX_STREAMS = int(os.environ.get('EVENTS_MAX_STREAMS', 4))
 
 class DevelopmentConfig(Config):
     """Development configuration"""
@@ -21,6 +141,17 @@ class ProductionConfig(Config):
     """Production configuration"""
     DEBUG = False
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///instance/database.db'
+    # SQLAlchemy only accepts the postgresql:// scheme (Render hands out postgres://)
+    if SQLALCHEMY_DATABASE_URI.startswith('postgres://'):
+        SQLALCHEMY_DATABASE_URI = SQLALCHEMY_DATABASE_URI.replace('postgres://', 'postgresql://', 1)
+    SCHEMA_STARTUP = os.environ.get('SCHEMA_STARTUP', 'check')
+    # Share cached analytics across gunicorn workers unless overridden
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'sqlite')
+    FRAGMENT_CACHE_BACKEND = os.environ.get('FRAGMENT_CACHE_BACKEND', 'sqlite')
+    CACHE_STATS_LOG_INTERVAL = int(os.environ.get('CACHE_STATS_LOG_INTERVAL', 500))
+    DB_POOL_STATS_LOG_INTERVAL = int(os.environ.get('DB_POOL_STATS_LOG_INTERVAL', 300))
+    # Never expose per-route traffic unauthenticated
+    METRICS_REQUIRE_TOKEN = os.environ.get('METRICS_REQUIRE_TOKEN', 'true').lower() in ('1', 'true', 'yes')
 
 class TestingConfig(Config):
     """Testing configuration"""
@@ -0,0 +1,71 @@
+"""
+Cold-start timing report for create_app
+
+Each sample boots the app in a fresh interpreter (as a gunicorn worker
+would) against a scratch SQLite database that has already been through
+preflight, and reports the median time spent in create_app for:
+
+  legacy  - create_all + migrations on every boot (previous behaviour)
+  auto    - schema version check, set up only if behind (dev default)
+  check   - schema version check only (production default)
+  off     - no schema work at all
+
+Usage: python startup_report.py [--runs 7]
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+CHILD = r'''
+import json, sys, time, logging
+logging.disable(logging.CRITICAL)
+t0 = time.perf_counter()
+from app import create_app, migrations
+from app.models import db
+t1 = time.perf_counter()
+mode, uri = sys.argv[1], sys.argv[2]
+app = create_app('production', {
+    'SQLALCHEMY_DATABASE_URI': uri,
+    'SCHEMA_STARTUP': 'off' if mode == 'legacy' else mode,
+    'CACHE_BACKEND': 'memory',
+})
+if mode == 'legacy':
+    with app.app_context():
+        migrations.setup_schema(db)
+t2 = time.perf_counter()
+print(json.dumps({'import_ms': (t1 - t0) * 1000, 'create_app_ms': (t2 - t1) * 1000}))
+'''
+
+
+def sample(mode, uri):
+    out = subprocess.run([sys.executable, '-c', CHILD, mode, uri], cwd=ROOT,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=7)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix='performx-startup-'), 'startup.db')
+    uri = f"sqlite:///{db_path}"
+    sample('legacy', uri)  # preflight the scratch database
+
+    print(f"median of {args.runs} cold starts")
+    print(f"{'mode':<8}{'imports ms':>12}{'create_app ms':>15}")
+    for mode in ('legacy', 'auto', 'check', 'off'):
+        runs = [sample(mode, uri) for _ in range(args.runs)]
+        imports = statistics.median(r['import_ms'] for r in runs)
+        create = statistics.median(r['create_app_ms'] for r in runs)
+        print(f"{mode:<8}{imports:>12.1f}{create:>15.1f}")
+
+
+if __name__ == '__main__':
+    main()
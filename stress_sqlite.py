@@ -0,0 +1,111 @@
+"""
+SQLite concurrency stress test
+
+Runs several worker processes (like `gunicorn -w 4`) that hammer the task
+services against one SQLite file, first with the settings this app had
+before tuning (rollback journal, no busy timeout, no retries), where
+concurrent writers fail with "database is locked", and then with the
+tuned profile from config.py (WAL, busy timeout, lock retries). Prints
+throughput and error counts. Everything is written to a scratch directory.
+
+Usage: python stress_sqlite.py [--workers 4] [--seconds 10]
+"""
+import os
+import time
+import argparse
+import tempfile
+import multiprocessing
+from datetime import date
+
+PROFILES = {
+    # pysqlite waits up to 5s for a lock by default, which would hide the
+    # lock errors; timeout=0 fails at once, as an untuned SQLite client does
+    'default': {'SQLITE_PRAGMAS': {}, 'DB_LOCK_RETRIES': 0,
+                'SQLALCHEMY_ENGINE_OPTIONS': {'connect_args': {'timeout': 0}}},
+    'tuned':   {},  # config.py defaults
+}
+
+
+def _make_app(db_path, profile):
+    from app import create_app
+    scratch = os.path.dirname(db_path)
+    overrides = {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{db_path}",
+        'SCHEMA_STARTUP': 'auto',
+        'CACHE_BACKEND': 'null',
+        'FRAGMENT_CACHE_BACKEND': 'null',
+        'METRICS_DB_PATH': os.path.join(scratch, 'metrics.db'),
+        'EVENTS_DB_PATH': os.path.join(scratch, 'events.db'),
+    }
+    overrides.update(PROFILES[profile])
+    return create_app('production', overrides)
+
+
+def _worker(db_path, profile, user_id, seconds, results):
+    import logging
+    logging.disable(logging.WARNING)
+    from app.services import TaskService
+    app = _make_app(db_path, profile)
+    ops = errors = 0
+    deadline = time.perf_counter() + seconds
+    with app.app_context():
+        while time.perf_counter() < deadline:
+            try:
+                task, _ = TaskService.create_task('stress', 'load test', '2030-01-01', user_id)
+                if task is None:
+                    errors += 1
+                    continue
+                ok, _ = TaskService.complete_task(task.id, user_id)
+                errors += 0 if ok else 1
+                TaskService.get_analytics(user_id, date.today())
+                ops += 3
+            except Exception:
+                errors += 1
+    results.put((ops, errors))
+
+
+def run_profile(profile, workers, seconds):
+    tmp = tempfile.mkdtemp(prefix='performx-stress-')
+    db_path = os.path.join(tmp, 'stress.db')
+
+    app = _make_app(db_path, profile)
+    with app.app_context():
+        from app.models import db, User
+        user = User(full_name='Stress', email='stress@example.com', password='x')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+        db.engine.dispose()
+
+    results = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=_worker,
+                                     args=(db_path, profile, user_id, seconds, results))
+             for _ in range(workers)]
+    start = time.perf_counter()
+    for p in procs:
+        p.start()
+    totals = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - start
+
+    ops = sum(t[0] for t in totals)
+    errors = sum(t[1] for t in totals)
+    return ops, errors, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+
+    print(f"{args.workers} workers x {args.seconds:.0f}s, ops = create + complete + analytics read")
+    print(f"{'profile':<10}{'ops':>10}{'ops/sec':>12}{'errors':>10}")
+    for profile in PROFILES:
+        ops, errors, elapsed = run_profile(profile, args.workers, args.seconds)
+        print(f"{profile:<10}{ops:>10}{ops / elapsed:>12.1f}{errors:>10}")
+
+
+if __name__ == '__main__':
+    main()